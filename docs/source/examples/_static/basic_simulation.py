@@ -4,6 +4,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from engine.core import ThermoSimulator
 from engine.enums import BoundaryCondition, UpdateRule
+from viz.plotter import PlotObserver
 
 # Initialize simulator
 simulator = ThermoSimulator(
@@ -14,7 +15,7 @@ simulator = ThermoSimulator(
 )
 
 # Run simulation
-simulator.run(steps=1000, plot_interval=100)
+simulator.run(steps=1000, measure_interval=100, observers=[PlotObserver()])
 
 # Save figure
 plt.savefig('basic_simulation.png', dpi=300, bbox_inches='tight')
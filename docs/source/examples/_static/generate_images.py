@@ -4,7 +4,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 from engine.core import ThermoSimulator
 from engine.enums import BoundaryCondition, UpdateRule
-from viz.plotter import Plotter
+from engine.tempering import ParallelTempering
+from scheduler.sweep import sweep_temperatures
+from viz.plotter import Plotter, PlotObserver
 
 def generate_basic_simulation():
     """Generate basic simulation image."""
@@ -16,7 +18,7 @@ def generate_basic_simulation():
     )
 
     # Run simulation
-    simulator.run(steps=1000, plot_interval=100)
+    simulator.run(steps=1000, measure_interval=100, observers=[PlotObserver()])
     plt.savefig('basic_simulation.png', dpi=300, bbox_inches='tight')
     plt.close()
 
@@ -33,11 +35,8 @@ def generate_visualization():
     plotter = Plotter(simulator)
 
     # Run simulation
-    for step in range(1000):
-        simulator._update_step()
-        if step % 10 == 0:
-            simulator.metrics.update(simulator)
-            plotter.update()
+    for _ in simulator.iterate(sweeps_per_sample=10, n_samples=100, record_metrics=True):
+        plotter.update()
 
     plt.savefig('visualization.png', dpi=300, bbox_inches='tight')
     plt.close()
@@ -45,29 +44,21 @@ def generate_visualization():
 def generate_parallel_tempering():
     """Generate parallel tempering image."""
     temperatures = np.linspace(1.0, 4.0, 8)
-    simulators = [
-        ThermoSimulator(
-            grid_size=50,
-            temperature=T,
-            boundary=BoundaryCondition.PERIODIC,
-            update_rule=UpdateRule.METROPOLIS
-        )
-        for T in temperatures
-    ]
-
-    # Run simulation
-    for step in range(1000):
-        for sim in simulators:
-            sim._update_step()
-            if step % 100 == 0:
-                sim.metrics.update(sim)
+    with ParallelTempering(
+        temperatures,
+        grid_size=50,
+        boundary=BoundaryCondition.PERIODIC,
+        update_rule=UpdateRule.METROPOLIS
+    ) as pt:
+        pt.run(n_rounds=100, sweeps_per_exchange=10)
+        grids = pt.configurations()
 
     # Plot results
     fig, axes = plt.subplots(2, 4, figsize=(16, 8))
     axes = axes.ravel()
 
-    for i, (sim, T) in enumerate(zip(simulators, temperatures)):
-        axes[i].imshow(sim.grid, cmap='RdBu')
+    for i, (grid, T) in enumerate(zip(grids, pt.temperatures)):
+        axes[i].imshow(grid, cmap='RdBu')
         axes[i].set_title(f'T = {T:.2f}')
 
     plt.tight_layout()
@@ -94,11 +85,9 @@ def generate_custom_boundaries():
     ]
 
     # Run simulations
-    for step in range(1000):
-        for sim in simulators:
-            sim._update_step()
-            if step % 100 == 0:
-                sim.metrics.update(sim)
+    for sim in simulators:
+        for _ in sim.iterate(sweeps_per_sample=100, n_samples=10, record_metrics=True):
+            pass
 
     # Plot results
     fig, axes = plt.subplots(2, 2, figsize=(12, 12))
@@ -115,45 +104,18 @@ def generate_custom_boundaries():
 def generate_phase_transitions():
     """Generate phase transitions image."""
     temperatures = np.linspace(1.0, 4.0, 20)
-    grid_size = 50
-    steps = 1000
-    equilibration = 500
-
-    energies = []
-    magnetizations = []
-    specific_heats = []
-    susceptibilities = []
-
-    for T in temperatures:
-        sim = ThermoSimulator(
-            grid_size=grid_size,
-            temperature=T,
-            boundary=BoundaryCondition.PERIODIC,
-            update_rule=UpdateRule.METROPOLIS
-        )
-
-        # Equilibration
-        for _ in range(equilibration):
-            sim._update_step()
-
-        # Measurement
-        E_samples = []
-        M_samples = []
-        for _ in range(steps):
-            sim._update_step()
-            E_samples.append(sim.energy)
-            M_samples.append(abs(sim.magnetization))
-
-        # Compute observables
-        E_mean = np.mean(E_samples)
-        M_mean = np.mean(M_samples)
-        C = np.var(E_samples) / (T * T)
-        chi = np.var(M_samples) / T
-
-        energies.append(E_mean)
-        magnetizations.append(M_mean)
-        specific_heats.append(C)
-        susceptibilities.append(chi)
+    diagram = sweep_temperatures(
+        temperatures,
+        grid_size=50,
+        update_rule=UpdateRule.METROPOLIS,
+        n_equil=500,
+        n_measure=1000,
+        boundary=BoundaryCondition.PERIODIC
+    )
+    energies = diagram['energy']
+    magnetizations = diagram['magnetization']
+    specific_heats = diagram['specific_heat']
+    susceptibilities = diagram['susceptibility']
 
     # Plot results
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(12, 12))
@@ -202,14 +164,10 @@ def generate_critical_phenomena():
             )
 
             # Equilibration
-            for _ in range(equilibration):
-                sim._update_step()
+            sim.sweep(equilibration)
 
             # Measurement
-            M_samples = []
-            for _ in range(steps):
-                sim._update_step()
-                M_samples.append(sim.magnetization)
+            M_samples = [sample.magnetization for sample in sim.iterate(n_samples=steps)]
 
             # Compute observables
             M = np.mean(np.abs(M_samples))
@@ -271,10 +229,10 @@ def generate_domain_walls():
     snapshots = []
     times = [0, 100, 500, 1000]
 
-    for step in range(max(times)):
-        simulator._update_step()
-        if step in times:
-            snapshots.append(simulator.grid.copy())
+    snapshots.append(simulator.grid.copy())
+    for sample in simulator.iterate(sweeps_per_sample=100, n_samples=max(times) // 100, include_grid=True):
+        if sample.sweep in times:
+            snapshots.append(sample.grid.copy())
 
     # Plot results
     fig, axes = plt.subplots(1, 4, figsize=(16, 4))
@@ -1,14 +1,36 @@
 """Core simulation engine components."""
 
-from .core import ThermoSimulator
-from .thermodynamics import SimulationMetrics
+from .core import ThermoSimulator, Sample
+from .lattice import Lattice
+from .thermodynamics import SimulationMetrics, RunningMoments
 from .state_manager import StateManager
-from .enums import BoundaryCondition, UpdateRule
+from .tempering import ParallelTempering
+from .wang_landau import WangLandau, DensityOfStates
+from .batch import BatchSimulator
+from .trajectory import TrajectoryWriter
+from .checkpoint import Checkpointer, restore_checkpoint
+from .observers import Observer, CallbackObserver, ThrottledObserver
+from .enums import BoundaryCondition, UpdateRule, SweepOrder, LatticeStorage
 
 __all__ = [
     'ThermoSimulator',
+    'Sample',
+    'Lattice',
     'BoundaryCondition',
     'UpdateRule',
+    'SweepOrder',
+    'LatticeStorage',
     'SimulationMetrics',
-    'StateManager'
+    'RunningMoments',
+    'StateManager',
+    'Observer',
+    'CallbackObserver',
+    'ThrottledObserver',
+    'ParallelTempering',
+    'WangLandau',
+    'DensityOfStates',
+    'BatchSimulator',
+    'TrajectoryWriter',
+    'Checkpointer',
+    'restore_checkpoint'
 ] 
\ No newline at end of file
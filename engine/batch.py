@@ -0,0 +1,159 @@
+"""Batched simulation of many independent lattices in one array."""
+
+from typing import Optional, Sequence, Tuple, Union
+import numpy as np
+import numba
+from numba import jit, prange
+
+from .enums import SweepOrder, UpdateRule
+from .core import _LOCAL_RULES, _build_acceptance_table, _spin_trial
+
+# Integer codes of the site orders understood by the batched kernel
+_SWEEP_ORDERS = {
+    SweepOrder.RANDOM: 0,
+    SweepOrder.SEQUENTIAL: 1,
+    SweepOrder.CHECKERBOARD: 2,
+}
+
+@jit(nopython=True, parallel=True)
+def batch_sweep_numba(
+    grids: np.ndarray,
+    tables: np.ndarray,
+    rule: int,
+    order: int,
+    n_sweeps: int,
+    energies: np.ndarray,
+    magnetizations: np.ndarray,
+    accepted: np.ndarray
+) -> None:
+    """Sweep every lattice of an ``(R, L, L)`` batch with its own acceptance table.
+
+    Replicas are distributed over threads, each one swept serially in the
+    given site order. Energies, magnetizations and accepted-move counts are
+    updated in place.
+    """
+    n_replicas, size, _ = grids.shape
+    for r in prange(n_replicas):
+        grid = grids[r]
+        table = tables[r]
+        delta_energy = 0
+        delta_magnetization = 0
+        n_accepted = 0
+        for _ in range(n_sweeps):
+            if order == 0:
+                for _ in range(size * size):
+                    i = np.random.randint(0, size)
+                    j = np.random.randint(0, size)
+                    spin = grid[i, j]
+                    flipped, delta = _spin_trial(grid, i, j, table, rule)
+                    if flipped:
+                        delta_energy += delta
+                        delta_magnetization -= 2 * spin
+                        n_accepted += 1
+            else:
+                for color in range(2 if order == 2 else 1):
+                    for i in range(size):
+                        start = (i + color) % 2 if order == 2 else 0
+                        for j in range(start, size, 2 if order == 2 else 1):
+                            spin = grid[i, j]
+                            flipped, delta = _spin_trial(grid, i, j, table, rule)
+                            if flipped:
+                                delta_energy += delta
+                                delta_magnetization -= 2 * spin
+                                n_accepted += 1
+        energies[r] += delta_energy
+        magnetizations[r] += delta_magnetization
+        accepted[r] += n_accepted
+
+class BatchSimulator:
+    """R independent periodic lattices stored as one ``(R, L, L)`` int8 array.
+
+    Each replica has its own temperature; a call to :meth:`sweep` advances all
+    of them in a single compiled call, one replica per thread, and keeps
+    per-replica energy and magnetization vectors. Meant for disorder averages
+    and temperature scans over many small lattices, where one
+    ``ThermoSimulator`` per lattice would be dominated by interpreter overhead.
+    """
+
+    def __init__(
+        self,
+        temperatures: Union[float, Sequence[float]] = 1.0,
+        grid_size: int = 16,
+        n_replicas: Optional[int] = None,
+        update_rule: UpdateRule = UpdateRule.METROPOLIS,
+        sweep_order: SweepOrder = SweepOrder.RANDOM,
+        num_processes: int = 1
+    ):
+        """Initialize the batch; a scalar temperature needs ``n_replicas``."""
+        temperatures = np.asarray(temperatures, dtype=np.float64)
+        if temperatures.ndim == 0:
+            temperatures = np.full(n_replicas or 1, float(temperatures))
+        elif n_replicas is not None and n_replicas != temperatures.shape[0]:
+            raise ValueError("n_replicas does not match the number of temperatures")
+        if update_rule not in _LOCAL_RULES:
+            raise ValueError(f"Batched simulation does not support {update_rule.value} updates")
+        if sweep_order not in _SWEEP_ORDERS:
+            raise ValueError(f"Batched simulation does not support {sweep_order.value} sweeps")
+        if sweep_order == SweepOrder.CHECKERBOARD and grid_size % 2:
+            raise ValueError("Checkerboard sweeps require an even grid_size")
+
+        self.grid_size = grid_size
+        self.update_rule = update_rule
+        self.sweep_order = sweep_order
+        self.num_threads = max(1, min(num_processes, numba.config.NUMBA_NUM_THREADS))
+        self._rule = _LOCAL_RULES[update_rule]
+        self.temperatures = temperatures
+
+        shape = (temperatures.shape[0], grid_size, grid_size)
+        self.grids = np.random.randint(0, 2, size=shape, dtype=np.int8) * 2 - 1
+        self._initialize_metrics()
+
+    @property
+    def n_replicas(self) -> int:
+        """Number of lattices in the batch."""
+        return self.grids.shape[0]
+
+    @property
+    def temperatures(self) -> np.ndarray:
+        """Temperature of every replica."""
+        return self._temperatures
+
+    @temperatures.setter
+    def temperatures(self, value: Sequence[float]) -> None:
+        """Set the replica temperatures and rebuild their acceptance tables."""
+        self._temperatures = np.array(value, dtype=np.float64)
+        self._tables = np.stack([_build_acceptance_table(T, self._rule) for T in self._temperatures])
+
+    def set_grids(self, grids: np.ndarray) -> None:
+        """Replace the lattices with a ``(R, L, L)`` +-1 array."""
+        grids = np.ascontiguousarray(grids, dtype=np.int8)
+        if grids.shape != self.grids.shape:
+            raise ValueError(f"Expected grids of shape {self.grids.shape}, got {grids.shape}")
+        self.grids = grids
+        self._initialize_metrics()
+
+    def _initialize_metrics(self) -> None:
+        """Recompute energies and magnetizations and reset the move counters."""
+        grids = self.grids.astype(np.int64)
+        bonds = grids * (np.roll(grids, -1, axis=1) + np.roll(grids, -1, axis=2))
+        self.energies = -bonds.sum(axis=(1, 2))
+        self.magnetizations = grids.sum(axis=(1, 2))
+        self.accepted_moves = np.zeros(self.n_replicas, dtype=np.int64)
+        self.total_moves = 0
+        self.sweep_count = 0
+
+    @property
+    def acceptance_rates(self) -> np.ndarray:
+        """Fraction of accepted moves of every replica."""
+        return self.accepted_moves / max(1, self.total_moves)
+
+    def sweep(self, n_sweeps: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Advance all replicas by ``n_sweeps`` sweeps; return their (energies, magnetizations)."""
+        numba.set_num_threads(self.num_threads)
+        batch_sweep_numba(
+            self.grids, self._tables, self._rule, _SWEEP_ORDERS[self.sweep_order], n_sweeps,
+            self.energies, self.magnetizations, self.accepted_moves
+        )
+        self.total_moves += n_sweeps * self.grid_size * self.grid_size
+        self.sweep_count += n_sweeps
+        return self.energies, self.magnetizations
@@ -0,0 +1,214 @@
+"""Crash-safe checkpoints written by a background thread."""
+
+import copy
+import os
+import pickle
+import queue
+import threading
+from dataclasses import fields
+from typing import Any, Dict, Optional
+
+from .enums import BoundaryCondition, UpdateRule, LatticeStorage
+from .observers import Observer
+from .series import Series
+from .wang_landau import WangLandauWalker
+from . import rng
+
+CHECKPOINT_VERSION = 1
+
+def _snapshot_metrics(metrics: Any) -> Any:
+    """Copy of the metrics whose time series share their recorded history (see :meth:`Series.snapshot`).
+
+    Only the accumulators are copied, so a checkpoint does not cost time
+    proportional to the length of the run.
+    """
+    snapshot = copy.copy(metrics)
+    for f in fields(metrics):
+        value = getattr(metrics, f.name)
+        setattr(snapshot, f.name, value.snapshot() if isinstance(value, Series) else copy.deepcopy(value))
+    return snapshot
+
+def _capture_sampler(sampler: Any) -> Optional[Dict[str, Any]]:
+    """Copy of a flat-histogram sampler's state without its lattice and spins, which the simulator provides."""
+    if sampler is None:
+        return None
+    state = {name: value for name, value in vars(sampler).items() if name not in ('lattice', 'spins')}
+    return {'type': type(sampler), 'state': copy.deepcopy(state)}
+
+def _restore_sampler(captured: Optional[Dict[str, Any]], simulator: Any) -> Any:
+    """Rebuild a sampler saved by :func:`_capture_sampler` on the simulator's lattice and spins."""
+    if captured is None:
+        return None
+    sampler = captured['type'].__new__(captured['type'])
+    vars(sampler).update(captured['state'])
+    sampler.lattice = simulator._structure()
+    if isinstance(sampler, WangLandauWalker):
+        sampler.spins = simulator.grid.reshape(-1)
+    return sampler
+
+def capture_state(simulator: Any) -> Dict[str, Any]:
+    """Copy everything a bit-for-bit resume needs: lattice, counters, metrics, sampler and RNG state."""
+    lattice = simulator.packed if simulator.storage == LatticeStorage.MULTISPIN else simulator.grid
+    return {
+        'version': CHECKPOINT_VERSION,
+        'grid_size': simulator.grid_size,
+        'boundary': simulator.boundary.value,
+        'update_rule': simulator.update_rule.value,
+        'storage': simulator.storage.value,
+        'lattice': lattice.copy(),
+        'boundary_seed': simulator._boundary_seed,
+        'temperature': simulator.temperature,
+        'energy': simulator.energy,
+        'magnetization': simulator.magnetization,
+        'accepted_moves': simulator.accepted_moves,
+        'total_moves': simulator.total_moves,
+        'sweep_count': simulator.sweep_count,
+        'cluster_state': (
+            simulator._mean_cluster_size,
+            list(simulator._cluster_stats),
+            simulator._cluster_stats_temperature
+        ),
+        'metrics': _snapshot_metrics(simulator.metrics),
+        'wang_landau': _capture_sampler(simulator._walker),
+        'density_of_states': copy.deepcopy(simulator.density_of_states),
+        'multicanonical': _capture_sampler(simulator.multicanonical),
+        'n_fold_bins': None if simulator._bins is None else tuple(array.copy() for array in simulator._bins),
+        'rng': rng.get_state(),
+    }
+
+def write_checkpoint(state: Dict[str, Any], filename: str) -> None:
+    """Write a captured state atomically: to a temporary file, then rename over ``filename``."""
+    temporary = f"{filename}.tmp"
+    with open(temporary, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, filename)
+
+def restore_checkpoint(simulator: Any, filename: str) -> None:
+    """Load a checkpoint into ``simulator``, including the random generator state."""
+    with open(filename, 'rb') as f:
+        state = pickle.load(f)
+    if state['grid_size'] != simulator.grid_size:
+        raise ValueError(f"Checkpoint grid_size {state['grid_size']} does not match {simulator.grid_size}")
+
+    simulator.boundary = BoundaryCondition(state['boundary'])
+    simulator.update_rule = UpdateRule(state['update_rule'])
+    simulator.storage = LatticeStorage(state['storage'])
+    simulator._boundary_seed = state['boundary_seed']
+    simulator._structure_cache = None
+    if simulator.storage == LatticeStorage.MULTISPIN:
+        simulator.packed = state['lattice']
+        simulator._grid = None
+    else:
+        simulator.grid = state['lattice']
+        simulator.packed = None
+    simulator.temperature = state['temperature']
+    simulator._initialize_metrics()
+
+    simulator.energy = state['energy']
+    simulator.magnetization = state['magnetization']
+    simulator.accepted_moves = state['accepted_moves']
+    simulator.total_moves = state['total_moves']
+    simulator.sweep_count = state['sweep_count']
+    mean_size, stats, stats_temperature = state['cluster_state']
+    simulator._mean_cluster_size = mean_size
+    simulator._cluster_stats = stats
+    simulator._cluster_stats_temperature = stats_temperature
+    simulator.metrics = state['metrics']
+    simulator._walker = _restore_sampler(state.get('wang_landau'), simulator)
+    simulator.density_of_states = state.get('density_of_states')
+    simulator.multicanonical = _restore_sampler(state.get('multicanonical'), simulator)
+    # The n-fold way draws from the class bins in their stored order, so they are restored, not rebuilt
+    if state.get('n_fold_bins') is not None:
+        simulator._bins = state['n_fold_bins']
+        simulator._bins_lattice = simulator._structure()
+    rng.set_state(state['rng'])
+
+class Checkpointer(Observer):
+    """Periodically checkpoints a run without blocking it.
+
+    At every ``interval``-th measurement the state is copied in memory (see
+    :func:`capture_state`) and handed to a background thread, which pickles
+    it and atomically replaces ``filename``, so a crash while writing leaves
+    the previous checkpoint intact. At most ``max_pending`` snapshots wait
+    for the writer; beyond that the simulation waits. The final state is
+    checkpointed when the run finishes.
+
+    Resuming with :func:`restore_checkpoint` continues bit-for-bit when the
+    run is repeated with the same measurement spacing and the kernels run
+    on a single thread (per-thread generators of parallel kernels are not
+    captured).
+    """
+
+    def __init__(self, filename: str, interval: int = 1, max_pending: int = 2):
+        """Initialize the checkpointer and start its writer thread."""
+        self.filename = filename
+        self.interval = interval
+        self.written = 0
+        self._measurements = 0
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._write_loop, name='checkpoint-writer', daemon=True)
+        self._thread.start()
+
+    def _write_loop(self) -> None:
+        """Write queued snapshots until the stop marker arrives."""
+        while True:
+            state = self._queue.get()
+            try:
+                if state is None:
+                    return
+                write_checkpoint(state, self.filename)
+                self.written += 1
+            except Exception as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        """Re-raise a failure of the writer thread in the caller."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def checkpoint(self, simulator: Any) -> None:
+        """Snapshot the simulator now and queue it for writing."""
+        self._raise_error()
+        if not self._thread.is_alive():
+            raise RuntimeError("Checkpointer is closed")
+        self._queue.put(capture_state(simulator))
+
+    def wait(self) -> None:
+        """Block until every queued checkpoint is on disk."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Write the remaining checkpoints and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
+
+    def on_start(self, simulator: Any) -> None:
+        """Restart the measurement count."""
+        self._measurements = 0
+
+    def on_measurement(self, simulator: Any) -> None:
+        """Checkpoint every ``interval``-th measurement."""
+        self._measurements += 1
+        if self._measurements % self.interval == 0:
+            self.checkpoint(simulator)
+
+    def on_finish(self, simulator: Any) -> None:
+        """Checkpoint the final state unless it was just saved, then wait for the writer."""
+        if self._measurements % self.interval:
+            self.checkpoint(simulator)
+        self.wait()
+
+    def __enter__(self) -> 'Checkpointer':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,186 @@
+"""Cluster update kernels for the Ising model."""
+
+from typing import Tuple, Union
+import numpy as np
+from numba import jit, prange
+
+def bond_probability(temperature: float, couplings: Union[float, np.ndarray] = 1.0) -> Union[float, np.ndarray]:
+    """Fortuin-Kasteleyn bond activation probability 1 - exp(-2|J|/T) of each coupling."""
+    strength = np.abs(np.asarray(couplings, dtype=np.float64))
+    if temperature <= 0:
+        probability = np.where(strength > 0, 1.0, 0.0)
+    else:
+        probability = 1.0 - np.exp(-2.0 * strength / temperature)
+    return probability if probability.ndim else float(probability)
+
+@jit(nopython=True)
+def wolff_numba(
+    spins: np.ndarray,
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    couplings: np.ndarray,
+    frozen: np.ndarray,
+    probabilities: np.ndarray,
+    min_visited: int,
+    members: np.ndarray,
+    in_cluster: np.ndarray,
+    sizes: np.ndarray
+) -> Tuple[int, int, int, int]:
+    """Grow ``sizes.shape[0]`` Wolff clusters, or fewer once ``min_visited`` sites were visited.
+
+    The lattice is given by its CSR bonds (see ``Lattice``) and
+    ``probabilities`` holds the activation probability of every bond.
+    ``members`` and ``in_cluster`` are caller-owned work buffers of one entry
+    per site; ``members`` doubles as the breadth-first queue and
+    ``in_cluster`` is cleared again after every cluster, so no memory is
+    allocated per cluster. A cluster that reaches a frozen site is not
+    flipped. The size of every cluster is written to ``sizes``.
+
+    Returns ``(delta_energy, delta_magnetization, n_clusters, n_flipped_clusters)``.
+    """
+    n_sites = spins.shape[0]
+    delta_energy = 0
+    delta_magnetization = 0
+    n_clusters = 0
+    n_flipped = 0
+    visited = 0
+
+    while visited < min_visited and n_clusters < sizes.shape[0]:
+        seed = np.random.randint(0, n_sites)
+        if frozen[seed]:
+            continue
+
+        members[0] = seed
+        in_cluster[seed] = 1
+        size = 1
+        head = 0
+        pinned = False
+        while head < size and not pinned:
+            i = members[head]
+            head += 1
+            for p in range(indptr[i], indptr[i + 1]):
+                j = indices[p]
+                if in_cluster[j] or couplings[p] * spins[i] * spins[j] <= 0:
+                    continue
+                if np.random.random() < probabilities[p]:
+                    if frozen[j]:
+                        pinned = True
+                        break
+                    in_cluster[j] = 1
+                    members[size] = j
+                    size += 1
+
+        if not pinned:
+            for m in range(size):
+                i = members[m]
+                for p in range(indptr[i], indptr[i + 1]):
+                    j = indices[p]
+                    if not in_cluster[j]:
+                        delta_energy += 2 * couplings[p] * spins[i] * spins[j]
+            for m in range(size):
+                i = members[m]
+                delta_magnetization -= 2 * spins[i]
+                spins[i] = -spins[i]
+            n_flipped += 1
+
+        for m in range(size):
+            in_cluster[members[m]] = 0
+        sizes[n_clusters] = size
+        n_clusters += 1
+        visited += size
+
+    return delta_energy, delta_magnetization, n_clusters, n_flipped
+
+@jit(nopython=True, parallel=True)
+def activate_bonds_numba(
+    spins: np.ndarray,
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    couplings: np.ndarray,
+    probabilities: np.ndarray,
+    bonds: np.ndarray
+) -> None:
+    """Activate Fortuin-Kasteleyn bonds of satisfied links with their probabilities.
+
+    Only the CSR entry of a bond stored at its lower-numbered site is
+    considered, so each lattice bond is decided exactly once.
+    """
+    for i in prange(spins.shape[0]):
+        for p in range(indptr[i], indptr[i + 1]):
+            j = indices[p]
+            active = (j > i and couplings[p] * spins[i] * spins[j] > 0
+                      and np.random.random() < probabilities[p])
+            bonds[p] = 1 if active else 0
+
+@jit(nopython=True)
+def _find_root(parent: np.ndarray, i: int) -> int:
+    """Root of ``i`` with path halving."""
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+@jit(nopython=True)
+def label_clusters_numba(
+    bonds: np.ndarray, indptr: np.ndarray, indices: np.ndarray, labels: np.ndarray
+) -> int:
+    """Hoshen-Kopelman labelling of the active-bond clusters with union-find.
+
+    ``labels`` is used as the union-find parent array and finally holds
+    consecutive cluster labels ``0 .. n_clusters - 1`` in raster order of
+    their first site. Union by smaller root and path halving keep the pass
+    near-linear in the number of sites. Returns the number of clusters.
+    """
+    n_sites = labels.shape[0]
+    for i in range(n_sites):
+        labels[i] = i
+    for i in range(n_sites):
+        for p in range(indptr[i], indptr[i + 1]):
+            if bonds[p]:
+                root_i = _find_root(labels, i)
+                root_j = _find_root(labels, indices[p])
+                if root_i < root_j:
+                    labels[root_j] = root_i
+                elif root_j < root_i:
+                    labels[root_i] = root_j
+
+    for i in range(n_sites):
+        labels[i] = _find_root(labels, i)
+
+    # Roots precede their members, so one raster pass assigns consecutive labels
+    n_clusters = 0
+    for i in range(n_sites):
+        root = labels[i]
+        if root == i:
+            labels[i] = -(n_clusters + 1)
+            n_clusters += 1
+        else:
+            labels[i] = labels[root]
+    for i in range(n_sites):
+        labels[i] = -labels[i] - 1
+    return n_clusters
+
+@jit(nopython=True, parallel=True)
+def flip_clusters_numba(
+    spins: np.ndarray,
+    labels: np.ndarray,
+    n_clusters: int,
+    frozen: np.ndarray,
+    flips: np.ndarray
+) -> int:
+    """Flip every cluster with probability 1/2; clusters holding a frozen site stay put.
+
+    Returns the number of clusters flipped.
+    """
+    for c in range(n_clusters):
+        flips[c] = 1 if np.random.random() < 0.5 else 0
+    for i in range(spins.shape[0]):
+        if frozen[i]:
+            flips[labels[i]] = 0
+    n_flipped = 0
+    for c in range(n_clusters):
+        n_flipped += flips[c]
+    for i in prange(spins.shape[0]):
+        if flips[labels[i]]:
+            spins[i] = -spins[i]
+    return n_flipped
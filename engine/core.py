@@ -2,15 +2,134 @@
 
 import numpy as np
 from dataclasses import dataclass
-from typing import Tuple, Optional, List, Dict, Any, Callable
+from typing import Tuple, Optional, List, Dict, Any, Callable, Iterable, Iterator, NamedTuple, Union
+import numba
 from numba import jit, prange
 
 from utils.logger import setup_logger
-from .enums import BoundaryCondition, UpdateRule
+from .enums import BoundaryCondition, UpdateRule, SweepOrder, LatticeStorage
+from . import multispin
+from .cluster import (
+    bond_probability,
+    wolff_numba,
+    activate_bonds_numba,
+    label_clusters_numba,
+    flip_clusters_numba
+)
+from .lattice import Lattice, edge_conditions, lattice_energy_numba
+from .nfold import build_bins_numba, n_fold_way_numba
+from .fields import (
+    local_fields_numba,
+    field_sweep_random_numba,
+    field_sweep_sequential_numba,
+    field_sweep_colored_numba
+)
 from .state_manager import StateManager
+from .observers import Observer, CallbackObserver
+
+# Integer codes of the single-spin rules understood by the compiled kernels
+_METROPOLIS = 0
+_GLAUBER = 1
+_HEAT_BATH = 2
+
+_LOCAL_RULES = {
+    UpdateRule.METROPOLIS: _METROPOLIS,
+    UpdateRule.GLAUBER: _GLAUBER,
+    UpdateRule.HEAT_BATH: _HEAT_BATH,
+}
+
+def _build_acceptance_table(temperature: float, rule: int, max_field: int = 4) -> np.ndarray:
+    """Tabulate the update probabilities of a single-spin rule at one temperature.
+    
+    For Metropolis and Glauber entry ``k`` is the flip probability of a spin with
+    ``spin * field == k - max_field``; for heat-bath it is the probability of
+    setting the spin to +1 when ``field == k - max_field``. ``max_field`` bounds
+    the local field, 4 on the square lattice.
+    """
+    local = np.arange(-max_field, max_field + 1, dtype=np.float64)
+    if temperature <= 0:
+        # Zero-temperature limits: only downhill (and half of the flat) moves
+        if rule == _METROPOLIS:
+            return (local <= 0).astype(np.float64)
+        sign = -local if rule == _GLAUBER else local
+        return np.where(sign > 0, 1.0, np.where(sign < 0, 0.0, 0.5))
+    
+    beta = 1.0 / temperature
+    with np.errstate(over='ignore'):
+        if rule == _HEAT_BATH:
+            return 1.0 / (1.0 + np.exp(-2.0 * beta * local))
+        if rule == _GLAUBER:
+            return 1.0 / (1.0 + np.exp(2.0 * beta * local))
+        return np.minimum(1.0, np.exp(-2.0 * beta * local))
+
+@jit(nopython=True, inline='always')
+def _accept(spin: int, field: int, table: np.ndarray, rule: int) -> bool:
+    """Draw whether a spin in the given local field flips."""
+    offset = table.shape[0] // 2
+    if rule == _HEAT_BATH:
+        new_spin = 1 if np.random.random() < table[field + offset] else -1
+        return new_spin != spin
+    probability = table[spin * field + offset]
+    return probability >= 1.0 or np.random.random() < probability
+
+@jit(nopython=True)
+def _spin_trial(grid: np.ndarray, i: int, j: int, table: np.ndarray, rule: int) -> Tuple[bool, int]:
+    """Attempt a single-spin update of site (i, j) of a periodic grid; returns (flipped, delta_energy)."""
+    last = grid.shape[0] - 1
+    spin = grid[i, j]
+    field = (grid[i, j + 1 if j < last else 0] + grid[i, j - 1 if j > 0 else last]
+             + grid[i + 1 if i < last else 0, j] + grid[i - 1 if i > 0 else last, j])
+    flipped = _accept(spin, field, table, rule)
+    if flipped:
+        grid[i, j] = -spin
+        return True, 2 * spin * field
+    return False, 0
+
+@jit(nopython=True, inline='always')
+def _lattice_spin_trial(
+    spins: np.ndarray, site: int, indptr: np.ndarray, indices: np.ndarray, couplings: np.ndarray,
+    table: np.ndarray, rule: int
+) -> Tuple[bool, int]:
+    """Attempt a single-spin update of a site of a flat lattice given by its CSR bonds."""
+    spin = spins[site]
+    field = 0
+    for p in range(indptr[site], indptr[site + 1]):
+        field += couplings[p] * spins[indices[p]]
+    flipped = _accept(spin, field, table, rule)
+    if flipped:
+        spins[site] = -spin
+        return True, 2 * spin * field
+    return False, 0
+
+# Multi-cluster rules; Hoshen-Kopelman names the labelling used by Swendsen-Wang
+_SWENDSEN_WANG_RULES = (UpdateRule.SWENDSEN_WANG, UpdateRule.HOSHEN_KOPELMAN)
+_CLUSTER_RULES = (UpdateRule.WOLFF,) + _SWENDSEN_WANG_RULES
+# Sweeps in the first thermalization chunk of run_adaptive
+_MIN_THERMALIZATION = 64
+# Short chunks underestimate tau_int; an estimate is trusted once doubling the chunk grows it by at most this factor
+_TAU_PLATEAU = 1.25
+_FLAT_HISTOGRAM_RULES = (UpdateRule.WANG_LANDAU, UpdateRule.MULTICANONICAL)
+
+class Sample(NamedTuple):
+    """One record yielded by :meth:`ThermoSimulator.iterate`."""
+    sweep: int
+    temperature: float
+    energy: float
+    magnetization: int
+    acceptance_rate: float
+    grid: Optional[np.ndarray] = None
 
 class ThermoSimulator:
-    """Main simulator class for thermodynamic computing."""
+    """Main simulator class for thermodynamic computing.
+    
+    By default the spins live on a ``grid_size`` x ``grid_size`` square
+    lattice with the given ``boundary``. Any other geometry (rectangular,
+    cubic, triangular, honeycomb or a ``networkx`` graph) is passed as a
+    :class:`~engine.lattice.Lattice`, which then replaces ``grid_size`` and
+    ``boundary``; ``grid`` takes the lattice's ``shape``. Lattices with
+    real-valued couplings or external fields, such as the Ising and QUBO
+    problems of :mod:`engine.problems`, are annealed with :meth:`anneal`.
+    """
     
     def __init__(
         self,
@@ -22,10 +141,16 @@ class ThermoSimulator:
         mixed_boundary_config: Optional[Dict[str, BoundaryCondition]] = None,
         num_processes: int = 1,
         use_acceleration: bool = True,
+        sweep_order: SweepOrder = SweepOrder.RANDOM,
+        storage: LatticeStorage = LatticeStorage.INT8,
+        lattice: Optional[Lattice] = None,
         log_level: int = 20  # logging.INFO
     ):
         """Initialize the simulator."""
+        if lattice is not None:
+            grid_size = lattice.shape[0]
         self.grid_size = grid_size
+        self.lattice = lattice
         self.temperature = temperature
         self.boundary = boundary
         self.update_rule = update_rule
@@ -33,6 +158,29 @@ class ThermoSimulator:
         self.mixed_boundary_config = mixed_boundary_config
         self.num_processes = num_processes
         self.use_acceleration = use_acceleration
+        self.sweep_order = sweep_order
+        self.storage = storage
+        self.num_threads = max(1, min(num_processes, numba.config.NUMBA_NUM_THREADS))
+        
+        edge_conditions(boundary, mixed_boundary_config)
+        self._boundary_seed = None
+        self._structure_cache = None
+        self._structure_key = None
+        if storage == LatticeStorage.MULTISPIN:
+            multispin.check_size(grid_size)
+            if (update_rule != UpdateRule.METROPOLIS or boundary != BoundaryCondition.PERIODIC
+                    or lattice is not None):
+                raise ValueError("Multispin storage supports periodic Metropolis on the square lattice only")
+        if lattice is not None and lattice.fields is not None and update_rule in _CLUSTER_RULES:
+            raise ValueError("Cluster updates do not support external fields")
+        if sweep_order == SweepOrder.N_FOLD_WAY and (
+                storage == LatticeStorage.MULTISPIN or (lattice is not None and lattice.weighted)):
+            raise ValueError("The n-fold way needs int8 storage and integer couplings without fields")
+        if update_rule in _FLAT_HISTOGRAM_RULES and lattice is not None and lattice.weighted:
+            raise ValueError("Flat-histogram sampling needs integer couplings without fields")
+        self.density_of_states = None
+        self.multicanonical = None
+        self._walker = None
         
         # Setup components
         self.logger = setup_logger(log_level)
@@ -46,19 +194,82 @@ class ThermoSimulator:
         
     def _initialize_grid(self):
         """Initialize the simulation grid."""
-        self.grid = np.random.choice([-1, 1], size=(self.grid_size, self.grid_size))
-        if self.boundary == BoundaryCondition.FIXED:
-            self.grid[0, :] = self.fixed_boundary_value
-            self.grid[-1, :] = self.fixed_boundary_value
-            self.grid[:, 0] = self.fixed_boundary_value
-            self.grid[:, -1] = self.fixed_boundary_value
+        self._grid = None
+        self.packed = None
+        grid = np.random.randint(0, 2, size=self.shape, dtype=np.int8) * 2 - 1
+        if not self._on_periodic_grid():
+            grid.reshape(-1)[self._structure().frozen] = self.fixed_boundary_value
+        self.grid = grid
+        
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Shape of the spin array: ``(grid_size, grid_size)`` or that of ``lattice``."""
+        if self.lattice is not None:
+            return self.lattice.shape
+        return (self.grid_size, self.grid_size)
+        
+    @property
+    def n_sites(self) -> int:
+        """Number of spins."""
+        return int(np.prod(self.shape))
+        
+    @property
+    def grid(self) -> np.ndarray:
+        """Spin configuration as a dense int8 array of ``shape``.
+        
+        With ``LatticeStorage.MULTISPIN`` this is an unpacked copy; write
+        changes back by assigning to ``grid``.
+        """
+        if self.storage == LatticeStorage.MULTISPIN:
+            return multispin.unpack_spins(self.packed)
+        return self._grid
+        
+    @grid.setter
+    def grid(self, value: np.ndarray) -> None:
+        """Store a +-1 configuration in the selected lattice representation."""
+        if self.storage == LatticeStorage.MULTISPIN:
+            self.packed = multispin.pack_spins(np.ascontiguousarray(value, dtype=np.int8))
+        else:
+            self._grid = np.ascontiguousarray(value, dtype=np.int8)
+        self._spins_changed()
+        
+    def reset(self, grid: Optional[np.ndarray] = None) -> None:
+        """Restart the move and sweep counters and recompute energy and magnetization.
+        
+        With ``grid`` the simulation continues from that configuration. The
+        metrics are kept; ``metrics.reset_statistics()`` restarts them.
+        """
+        if grid is not None:
+            self.grid = grid
+        self._initialize_metrics()
             
     def _initialize_metrics(self):
         """Initialize simulation metrics."""
-        self.energy = self._compute_energy_numba(self.grid)
-        self.magnetization = np.sum(self.grid)
+        numba.set_num_threads(self.num_threads)
+        self._cluster_members = None
+        self._bonds = None
+        self._cluster_labels = None
+        self._n_clusters = 0
+        self._mean_cluster_size = None
+        self._cluster_stats = [0, 0]
+        self._cluster_stats_temperature = None
+        if self.storage == LatticeStorage.MULTISPIN:
+            self.energy, self.magnetization = multispin.multispin_observables_numba(self.packed)
+        elif self._on_periodic_grid():
+            self.energy = self._compute_energy_numba(self.grid)
+            self.magnetization = np.sum(self.grid)
+        else:
+            self.energy = self._lattice_energy()
+            self.magnetization = np.sum(self.grid)
         self.accepted_moves = 0
         self.total_moves = 0
+        self.sweep_count = 0
+        self._table = None
+        self._table_key = None
+        self._digits = None
+        self._bond_probabilities = None
+        self._bond_key = None
+        self._spins_changed()
         
     @staticmethod
     @jit(nopython=True, parallel=True)
@@ -71,77 +282,772 @@ class ThermoSimulator:
                 right = grid[i, (j + 1) % size]
                 down = grid[(i + 1) % size, j]
                 energy -= grid[i, j] * (right + down)
-        return energy / 2
+        return energy
+        
+    @staticmethod
+    @jit(nopython=True)
+    def _sweep_random_numba(
+        grid: np.ndarray, table: np.ndarray, rule: int, n_trials: int
+    ) -> Tuple[int, int, int]:
+        """Numba-accelerated single-spin trials at uniformly random sites."""
+        size = grid.shape[0]
+        delta_energy = 0
+        delta_magnetization = 0
+        accepted = 0
+        for _ in range(n_trials):
+            i = np.random.randint(0, size)
+            j = np.random.randint(0, size)
+            spin = grid[i, j]
+            flipped, delta = _spin_trial(grid, i, j, table, rule)
+            if flipped:
+                delta_energy += delta
+                delta_magnetization -= 2 * spin
+                accepted += 1
+        return delta_energy, delta_magnetization, accepted
         
     @staticmethod
     @jit(nopython=True)
-    def _update_metropolis_numba(grid: np.ndarray, temperature: float) -> Tuple[bool, float]:
-        """Numba-accelerated Metropolis update."""
+    def _sweep_sequential_numba(
+        grid: np.ndarray, table: np.ndarray, rule: int, n_sweeps: int
+    ) -> Tuple[int, int, int]:
+        """Numba-accelerated typewriter-order sweeps over the whole grid."""
         size = grid.shape[0]
-        i, j = np.random.randint(0, size, 2)
-        current_spin = grid[i, j]
+        delta_energy = 0
+        delta_magnetization = 0
+        accepted = 0
+        for _ in range(n_sweeps):
+            for i in range(size):
+                for j in range(size):
+                    spin = grid[i, j]
+                    flipped, delta = _spin_trial(grid, i, j, table, rule)
+                    if flipped:
+                        delta_energy += delta
+                        delta_magnetization -= 2 * spin
+                        accepted += 1
+        return delta_energy, delta_magnetization, accepted
+        
+    @staticmethod
+    @jit(nopython=True, parallel=True)
+    def _sweep_checkerboard_numba(
+        grid: np.ndarray, table: np.ndarray, rule: int, n_sweeps: int
+    ) -> Tuple[int, int, int]:
+        """Numba-accelerated red/black sweeps, each sublattice updated in parallel."""
+        size = grid.shape[0]
+        delta_energy = 0
+        delta_magnetization = 0
+        accepted = 0
+        for _ in range(n_sweeps):
+            for color in range(2):
+                # Sites of one colour only have neighbours of the other colour,
+                # so the rows of a half-sweep can be updated concurrently.
+                for i in prange(size):
+                    for j in range((i + color) % 2, size, 2):
+                        spin = grid[i, j]
+                        flipped, delta = _spin_trial(grid, i, j, table, rule)
+                        if flipped:
+                            delta_energy += delta
+                            delta_magnetization += -2 * spin
+                            accepted += 1
+        return delta_energy, delta_magnetization, accepted
+        
+    @staticmethod
+    @jit(nopython=True)
+    def _lattice_sweep_random_numba(
+        spins: np.ndarray, indptr: np.ndarray, indices: np.ndarray, couplings: np.ndarray,
+        sites: np.ndarray, table: np.ndarray, rule: int, n_trials: int
+    ) -> Tuple[int, int, int]:
+        """Numba-accelerated single-spin trials at random updatable sites of a CSR lattice."""
+        delta_energy = 0
+        delta_magnetization = 0
+        accepted = 0
+        # Without frozen sites the site list is the identity; skip the extra load
+        direct = sites.shape[0] == spins.shape[0]
+        for _ in range(n_trials):
+            site = np.random.randint(0, sites.shape[0])
+            if not direct:
+                site = sites[site]
+            spin = spins[site]
+            flipped, delta = _lattice_spin_trial(spins, site, indptr, indices, couplings, table, rule)
+            if flipped:
+                delta_energy += delta
+                delta_magnetization -= 2 * spin
+                accepted += 1
+        return delta_energy, delta_magnetization, accepted
+        
+    @staticmethod
+    @jit(nopython=True)
+    def _lattice_sweep_sequential_numba(
+        spins: np.ndarray, indptr: np.ndarray, indices: np.ndarray, couplings: np.ndarray,
+        sites: np.ndarray, table: np.ndarray, rule: int, n_sweeps: int
+    ) -> Tuple[int, int, int]:
+        """Numba-accelerated sweeps over the updatable sites of a CSR lattice in index order."""
+        delta_energy = 0
+        delta_magnetization = 0
+        accepted = 0
+        for _ in range(n_sweeps):
+            for n in range(sites.shape[0]):
+                site = sites[n]
+                spin = spins[site]
+                flipped, delta = _lattice_spin_trial(spins, site, indptr, indices, couplings, table, rule)
+                if flipped:
+                    delta_energy += delta
+                    delta_magnetization -= 2 * spin
+                    accepted += 1
+        return delta_energy, delta_magnetization, accepted
+        
+    @staticmethod
+    @jit(nopython=True, parallel=True)
+    def _lattice_sweep_colored_numba(
+        spins: np.ndarray, indptr: np.ndarray, indices: np.ndarray, couplings: np.ndarray,
+        sites: np.ndarray, offsets: np.ndarray, table: np.ndarray, rule: int, n_sweeps: int
+    ) -> Tuple[int, int, int]:
+        """Numba-accelerated sweeps of a CSR lattice colour class by colour class, each in parallel."""
+        delta_energy = 0
+        delta_magnetization = 0
+        accepted = 0
+        for _ in range(n_sweeps):
+            for color in range(offsets.shape[0] - 1):
+                for n in prange(offsets[color], offsets[color + 1]):
+                    site = sites[n]
+                    spin = spins[site]
+                    flipped, delta = _lattice_spin_trial(spins, site, indptr, indices, couplings, table, rule)
+                    if flipped:
+                        delta_energy += delta
+                        delta_magnetization += -2 * spin
+                        accepted += 1
+        return delta_energy, delta_magnetization, accepted
+        
+    def _on_periodic_grid(self) -> bool:
+        """Whether the spins form a periodic square grid, which the 2D grid kernels handle."""
+        return self.lattice is None and self.boundary == BoundaryCondition.PERIODIC
+        
+    def _structure(self) -> Lattice:
+        """Return the CSR lattice the kernels run on (cached when built from ``boundary``)."""
+        if self.lattice is not None:
+            return self.lattice
+        config = self.mixed_boundary_config if self.boundary == BoundaryCondition.MIXED else None
+        key = (self.grid_size, self.boundary, tuple(sorted((config or {}).items(), key=lambda item: item[0])))
+        if self._structure_cache is None or self._structure_key != key:
+            if self._boundary_seed is None:
+                # Drawn once, so random boundary signs survive rebuilding the lattice
+                edges = edge_conditions(self.boundary, config)
+                if BoundaryCondition.RANDOM in edges.values():
+                    self._boundary_seed = int(np.random.randint(0, 2**31 - 1))
+            self._structure_cache = Lattice.square(self.grid_size, self.boundary, config, self._boundary_seed)
+            self._structure_key = key
+        return self._structure_cache
+        
+    def _lattice_energy(self) -> float:
+        """Energy of the current configuration from the CSR bonds, fields and offset."""
+        lattice = self._structure()
+        spins = self.grid.reshape(-1)
+        energy = lattice_energy_numba(spins, lattice.indptr, lattice.indices, lattice.couplings)
+        if lattice.fields is not None:
+            energy -= float(np.dot(lattice.fields, spins))
+        return energy + lattice.offset
+        
+    def _spins_changed(self) -> None:
+        """Drop the caches derived from the spins after they change outside their kernels."""
+        self._local = None
+        self._bins = None
+        
+    def _external_fields(self) -> np.ndarray:
+        """Per-site fields of the lattice (zeros without fields)."""
+        lattice = self._structure()
+        if lattice.fields is None:
+            return np.zeros(lattice.n_sites)
+        return lattice.fields
+        
+    def _field_cache(self) -> np.ndarray:
+        """Return the cached local field of every site, rebuilt after outside changes to the spins."""
+        if self._local is None:
+            lattice = self._structure()
+            self._local = np.empty(lattice.n_sites)
+            local_fields_numba(
+                self.grid.reshape(-1), lattice.indptr, lattice.indices, lattice.couplings,
+                self._external_fields(), self._local
+            )
+        return self._local
+        
+    def _bond_table(self) -> np.ndarray:
+        """Return the cached Fortuin-Kasteleyn activation probability of every CSR bond."""
+        lattice = self._structure()
+        key = (self.temperature, lattice)
+        if key != self._bond_key:
+            self._bond_probabilities = np.ascontiguousarray(
+                bond_probability(self.temperature, lattice.couplings), dtype=np.float64
+            )
+            self._bond_key = key
+        return self._bond_probabilities
+        
+    def _wolff_update(self, n_clusters: int, min_visited: Optional[int] = None) -> Tuple[int, int]:
+        """Grow ``n_clusters`` Wolff clusters (fewer once ``min_visited`` sites were visited).
+        
+        Returns the number of clusters grown and the number of sites they visited.
+        """
+        lattice = self._structure()
+        if lattice.frozen.all():
+            return 0, 0
+        n_sites = self.n_sites
+        probabilities = self._bond_table()
+        if self._cluster_members is None:
+            # Work buffers reused by every call of the cluster kernels
+            self._cluster_members = np.empty(n_sites, dtype=np.int32)
+            self._cluster_mask = np.zeros(n_sites, dtype=np.uint8)
+            self._cluster_sizes = np.empty(n_sites, dtype=np.int64)
+        if min_visited is None:
+            min_visited = np.iinfo(np.int64).max
+        
+        total_grown = 0
+        visited = 0
+        self._spins_changed()
+        while n_clusters > 0 and visited < min_visited:
+            delta_energy, delta_magnetization, grown, n_flipped = wolff_numba(
+                self.grid.reshape(-1), lattice.indptr, lattice.indices, lattice.couplings,
+                lattice.frozen, probabilities, min_visited - visited,
+                self._cluster_members, self._cluster_mask,
+                self._cluster_sizes[:min(n_clusters, n_sites)]
+            )
+            self.energy += delta_energy
+            self.magnetization += delta_magnetization
+            self.accepted_moves += n_flipped
+            self.total_moves += grown
+            sizes = self._cluster_sizes[:grown]
+            self.metrics.cluster_sizes.extend(sizes)
+            visited += int(sizes.sum())
+            n_clusters -= grown
+            total_grown += grown
+        return total_grown, visited
         
-        right = grid[i, (j + 1) % size]
-        left = grid[i, (j - 1) % size]
-        down = grid[(i + 1) % size, j]
-        up = grid[(i - 1) % size, j]
+    def _wolff_sweeps(self, n_sweeps: int) -> None:
+        """Flip the number of Wolff clusters equivalent to ``n_sweeps`` sweeps.
         
-        delta_energy = 2 * current_spin * (right + left + down + up)
+        Sweeps flip a number of clusters fixed in advance from the mean cluster
+        size seen so far at this temperature, rather than stopping once a site
+        count is reached: a state-dependent stopping point would bias the
+        measurements taken between sweeps toward small-cluster states.
+        """
+        n_sites = self.n_sites
+        if self._mean_cluster_size is None:
+            # Calibrate on a first sweep's worth of clusters
+            grown, visited = self._wolff_update(n_sites, min_visited=n_sites)
+            self._mean_cluster_size = visited / max(1, grown)
+        if self._cluster_stats_temperature != self.temperature:
+            self._cluster_stats = [0, 0]
+            self._cluster_stats_temperature = self.temperature
         
-        if delta_energy <= 0 or np.random.random() < np.exp(-delta_energy / temperature):
-            grid[i, j] *= -1
-            return True, delta_energy
-        return False, 0.0
+        per_sweep = max(1, int(round(n_sites / max(self._mean_cluster_size, 1.0))))
+        grown, visited = self._wolff_update(n_sweeps * per_sweep)
+        self._cluster_stats[0] += grown
+        self._cluster_stats[1] += visited
+        if self._cluster_stats[0]:
+            self._mean_cluster_size = self._cluster_stats[1] / self._cluster_stats[0]
+        
+    def _swendsen_wang_sweeps(self, n_sweeps: int) -> None:
+        """Perform ``n_sweeps`` Swendsen-Wang updates of the whole lattice."""
+        lattice = self._structure()
+        n_sites = self.n_sites
+        if self._bonds is None:
+            # Work buffers reused by every update
+            self._bonds = np.empty(lattice.indices.shape[0], dtype=np.uint8)
+            self._cluster_labels = np.empty(n_sites, dtype=np.int32)
+            self._cluster_flips = np.empty(n_sites, dtype=np.uint8)
+        
+        numba.set_num_threads(self.num_threads)
+        spins = self.grid.reshape(-1)
+        probabilities = self._bond_table()
+        self._spins_changed()
+        for _ in range(n_sweeps):
+            activate_bonds_numba(
+                spins, lattice.indptr, lattice.indices, lattice.couplings, probabilities, self._bonds
+            )
+            self._n_clusters = label_clusters_numba(
+                self._bonds, lattice.indptr, lattice.indices, self._cluster_labels
+            )
+            self.accepted_moves += flip_clusters_numba(
+                spins, self._cluster_labels, self._n_clusters, lattice.frozen, self._cluster_flips
+            )
+            self.total_moves += self._n_clusters
+        self.energy = self._lattice_energy()
+        self.magnetization = np.sum(self.grid)
+        
+    @property
+    def cluster_labels(self) -> Optional[np.ndarray]:
+        """Cluster labels ``0 .. n - 1`` of the last Swendsen-Wang update as a grid view."""
+        if self._cluster_labels is None:
+            return None
+        return self._cluster_labels.reshape(self.shape)
+        
+    def cluster_size_distribution(self) -> np.ndarray:
+        """Number of clusters of each size (indexed by size) in the last Swendsen-Wang update."""
+        if self._cluster_labels is None:
+            return np.zeros(0, dtype=np.int64)
+        return np.bincount(np.bincount(self._cluster_labels, minlength=self._n_clusters))
         
     def _update_step(self) -> None:
         """Perform one update step using the selected update rule."""
-        if self.use_acceleration:
-            if self.update_rule == UpdateRule.METROPOLIS:
-                accepted, delta_energy = self._update_metropolis_numba(self.grid, self.temperature)
-                if accepted:
-                    self.energy += delta_energy
-                    self.magnetization += delta_energy  # Delta energy is proportional to magnetization change
-                    self.accepted_moves += 1
-                self.total_moves += 1
+        if self.storage == LatticeStorage.MULTISPIN:
+            raise ValueError("Multispin storage only updates whole sweeps; use sweep()")
+        if self.update_rule not in _LOCAL_RULES and self.update_rule not in _CLUSTER_RULES:
+            raise ValueError(f"Update rule {self.update_rule.value} has no single-step update")
+        if self.update_rule == UpdateRule.WOLFF:
+            self._wolff_update(1)
+        elif self.update_rule in _SWENDSEN_WANG_RULES:
+            self._swendsen_wang_sweeps(1)
+        elif self.use_acceleration:
+            if self.update_rule in _LOCAL_RULES:
+                self._local_sweeps(SweepOrder.RANDOM, 0, n_trials=1)
         else:
             # Use non-accelerated methods
-            i, j = np.random.randint(0, self.grid_size, 2)
-            if self.boundary == BoundaryCondition.FIXED and (i == 0 or i == self.grid_size - 1 or 
-                                                           j == 0 or j == self.grid_size - 1):
+            site = np.random.randint(0, self.n_sites)
+            if self._structure().frozen[site]:
                 return
             
             accepted = False
             if self.update_rule == UpdateRule.METROPOLIS:
-                accepted = self._update_metropolis(i, j)
+                accepted = self._update_metropolis(site)
             elif self.update_rule == UpdateRule.GLAUBER:
-                accepted = self._update_glauber(i, j)
+                accepted = self._update_glauber(site)
             elif self.update_rule == UpdateRule.HEAT_BATH:
-                accepted = self._update_heat_bath(i, j)
+                accepted = self._update_heat_bath(site)
             
             self.total_moves += 1
             if accepted:
                 self.accepted_moves += 1
                 
+    def _local_sweeps(self, order: SweepOrder, n_sweeps: int, n_trials: Optional[int] = None) -> None:
+        """Run the compiled single-spin kernel for ``n_sweeps`` sweeps in the given order.
+        
+        Periodic square grids use the grid kernels; every other lattice uses
+        the CSR kernels, which only visit sites that are not frozen and run
+        checkerboard order over the colour classes of ``Lattice.color_classes``.
+        Weighted lattices use the kernels of :mod:`engine.fields`, and
+        ``SweepOrder.N_FOLD_WAY`` the rejection-free kernel of :mod:`engine.nfold`.
+        ``n_trials`` overrides the number of random-order trials.
+        """
+        rule = _LOCAL_RULES[self.update_rule]
+        if order == SweepOrder.N_FOLD_WAY:
+            result, n_sites = self._n_fold_way(n_sweeps)
+        elif self.lattice is not None and self.lattice.weighted:
+            result, n_sites = self._field_sweeps(order, rule, n_sweeps, n_trials)
+            if n_sites == 0:
+                return
+        elif self._on_periodic_grid() and (order != SweepOrder.CHECKERBOARD or self.grid_size % 2 == 0):
+            table = self._acceptance_table()
+            self._bins = None
+            n_sites = self.n_sites
+            if order == SweepOrder.CHECKERBOARD:
+                numba.set_num_threads(self.num_threads)
+                result = self._sweep_checkerboard_numba(self.grid, table, rule, n_sweeps)
+            elif order == SweepOrder.SEQUENTIAL:
+                result = self._sweep_sequential_numba(self.grid, table, rule, n_sweeps)
+            else:
+                n_trials = n_sweeps * n_sites if n_trials is None else n_trials
+                result = self._sweep_random_numba(self.grid, table, rule, n_trials)
+        else:
+            table = self._acceptance_table()
+            self._bins = None
+            lattice = self._structure()
+            bonds = (lattice.indptr, lattice.indices, lattice.couplings)
+            spins = self.grid.reshape(-1)
+            if order == SweepOrder.CHECKERBOARD:
+                sites, offsets = lattice.color_classes()
+                n_sites = sites.shape[0]
+                numba.set_num_threads(self.num_threads)
+                result = self._lattice_sweep_colored_numba(spins, *bonds, sites, offsets, table, rule, n_sweeps)
+            else:
+                sites = lattice.active_sites()
+                n_sites = sites.shape[0]
+                if n_sites == 0:
+                    return
+                if order == SweepOrder.SEQUENTIAL:
+                    result = self._lattice_sweep_sequential_numba(spins, *bonds, sites, table, rule, n_sweeps)
+                else:
+                    n_trials = n_sweeps * n_sites if n_trials is None else n_trials
+                    result = self._lattice_sweep_random_numba(spins, *bonds, sites, table, rule, n_trials)
+        delta_energy, delta_magnetization, accepted = result
+        self.energy += delta_energy
+        self.magnetization += delta_magnetization
+        self.accepted_moves += accepted
+        self.total_moves += n_sweeps * n_sites if n_trials is None else n_trials
+        
+    def _n_fold_way(self, duration: float) -> Tuple[Tuple[int, int, int], int]:
+        """Run rejection-free events for ``duration`` sweeps of continuous time.
+        
+        Events flip spins with the rates of the selected rule, whose one sweep
+        lasts one unit of time, so ``sweep_count`` stays Metropolis (or Glauber)
+        time. The class bins persist across calls and temperature changes.
+        Returns the kernel result and the number of updatable sites.
+        """
+        lattice = self._structure()
+        if self._bins is None or self._bins_lattice is not lattice:
+            self._bins = build_bins_numba(
+                self.grid.reshape(-1), lattice.indptr, lattice.indices, lattice.couplings,
+                lattice.frozen, lattice.max_field
+            )
+            self._bins_lattice = lattice
+        table = self._acceptance_table()
+        # Heat-bath tables hold P(+1) by field; as flip rates by spin * field they become 1 - P
+        rates = 1.0 - table if self.update_rule == UpdateRule.HEAT_BATH else table
+        result = n_fold_way_numba(
+            self.grid.reshape(-1), lattice.indptr, lattice.indices, lattice.couplings,
+            *self._bins, rates, float(duration)
+        )
+        return result, lattice.active_sites().shape[0]
+        
+    def _field_sweeps(
+        self, order: SweepOrder, rule: int, n_sweeps: int, n_trials: Optional[int]
+    ) -> Tuple[Optional[Tuple[float, int, int]], int]:
+        """Run the weighted-lattice kernels; returns their result and the number of updatable sites."""
+        lattice = self.lattice
+        bonds = (lattice.indptr, lattice.indices, lattice.couplings)
+        spins = self.grid.reshape(-1)
+        beta = np.inf if self.temperature <= 0 else 1.0 / self.temperature
+        if order == SweepOrder.CHECKERBOARD:
+            sites, offsets = lattice.color_classes()
+            numba.set_num_threads(self.num_threads)
+            result = field_sweep_colored_numba(
+                spins, *bonds, self._external_fields(), sites, offsets, beta, rule, n_sweeps
+            )
+            self._spins_changed()
+            return result, sites.shape[0]
+        
+        sites = lattice.active_sites()
+        if sites.shape[0] == 0:
+            return None, 0
+        local = self._field_cache()
+        if order == SweepOrder.SEQUENTIAL:
+            result = field_sweep_sequential_numba(spins, local, *bonds, sites, beta, rule, n_sweeps)
+        else:
+            n_trials = n_sweeps * sites.shape[0] if n_trials is None else n_trials
+            result = field_sweep_random_numba(spins, local, *bonds, sites, beta, rule, n_trials)
+        return result, sites.shape[0]
+        
+    def _acceptance_table(self) -> np.ndarray:
+        """Return the acceptance table for the current temperature and rule.
+        
+        The table is cached and only rebuilt when ``temperature`` or
+        ``update_rule`` changes, e.g. under a temperature schedule.
+        """
+        max_field = 4 if self._on_periodic_grid() else self._structure().max_field
+        key = (self.temperature, self.update_rule, self.storage, max_field)
+        if key != self._table_key:
+            self._table = _build_acceptance_table(self.temperature, _LOCAL_RULES[self.update_rule], max_field)
+            self._table_key = key
+            if self.storage == LatticeStorage.MULTISPIN:
+                # Binary digits of exp(-4/T) for the bit-sliced Bernoulli draws
+                self._digits = multispin.probability_bits(self._table[6])
+        return self._table
+        
+    def _local_field(self, site: int) -> float:
+        """Coupling-weighted sum of the neighbour spins of a site (flat index) plus its field."""
+        lattice = self._structure()
+        bonds = slice(lattice.indptr[site], lattice.indptr[site + 1])
+        spins = self.grid.reshape(-1)
+        field = np.dot(lattice.couplings[bonds].astype(np.float64), spins[lattice.indices[bonds]])
+        if lattice.fields is not None:
+            field += lattice.fields[site]
+        return float(field)
+        
+    def _flip(self, site: int, delta_energy: float) -> None:
+        """Flip a spin and update the running energy and magnetization."""
+        self._spins_changed()
+        spins = self.grid.reshape(-1)
+        self.magnetization -= 2 * spins[site]
+        spins[site] *= -1
+        self.energy += delta_energy
+        
+    def _update_metropolis(self, site: int) -> bool:
+        """Pure-Python Metropolis update of a site."""
+        delta_energy = 2 * self.grid.reshape(-1)[site] * self._local_field(site)
+        if delta_energy <= 0 or np.random.random() < np.exp(-delta_energy / self.temperature):
+            self._flip(site, delta_energy)
+            return True
+        return False
+        
+    def _update_glauber(self, site: int) -> bool:
+        """Pure-Python Glauber update of a site."""
+        delta_energy = 2 * self.grid.reshape(-1)[site] * self._local_field(site)
+        if np.random.random() < 1.0 / (1.0 + np.exp(delta_energy / self.temperature)):
+            self._flip(site, delta_energy)
+            return True
+        return False
+        
+    def _update_heat_bath(self, site: int) -> bool:
+        """Pure-Python heat-bath update of a site."""
+        field = self._local_field(site)
+        spin = self.grid.reshape(-1)[site]
+        new_spin = 1 if np.random.random() < 1.0 / (1.0 + np.exp(-2 * field / self.temperature)) else -1
+        if new_spin != spin:
+            self._flip(site, 2 * spin * field)
+            return True
+        return False
+        
+    def _wang_landau_sweeps(self, n_sweeps: int) -> None:
+        """Continue the Wang-Landau walk over the whole energy range and refresh ``density_of_states``.
+        
+        The walk ignores the temperature; its modification factor is halved
+        whenever the histogram is flat after a call. Use
+        :class:`engine.wang_landau.WangLandau` to split the range into
+        windows run in parallel.
+        """
+        from .wang_landau import WangLandauWalker
+        spins = self.grid.reshape(-1)
+        energy = int(round(self.energy))
+        if self._walker is None or self._walker.lattice is not self._structure():
+            self._walker = WangLandauWalker(self._structure(), spins)
+        else:
+            self._walker.set_state(spins, energy)
+        accepted, trials = self._walker.accepted, self._walker.trials
+        self._walker.run(n_sweeps)
+        self._spins_changed()
+        self.accepted_moves += self._walker.accepted - accepted
+        self.total_moves += self._walker.trials - trials
+        self.energy = self._walker.energy
+        self.magnetization = np.sum(spins)
+        self.density_of_states = self._walker.density_of_states()
+        
+    def _multicanonical_sweeps(self, n_sweeps: int) -> None:
+        """Sweep with the multicanonical weights of ``self.multicanonical``, refining them as configured.
+        
+        The weights are created on first use (and again whenever the lattice
+        is rebuilt), canonical at the current temperature; assign a
+        :class:`engine.multicanonical.Multicanonical` beforehand to choose the
+        iteration length or start from a density of states. Canonical
+        averages come from ``multicanonical.reweight``.
+        """
+        from .multicanonical import Multicanonical
+        lattice = self._structure()
+        if self.multicanonical is None or self.multicanonical.lattice is not lattice:
+            self.multicanonical = Multicanonical(lattice, self.temperature)
+        spins = self.grid.reshape(-1)
+        self.energy, self.magnetization, accepted = self.multicanonical.run(
+            spins, int(round(self.energy)), int(self.magnetization), n_sweeps
+        )
+        self._spins_changed()
+        self.accepted_moves += accepted
+        self.total_moves += n_sweeps * lattice.active_sites().shape[0]
+        
+    def sweep(self, n_sweeps: int = 1) -> None:
+        """Advance the simulation by ``n_sweeps`` Monte Carlo sweeps.
+        
+        One sweep is one attempted update per site that is not frozen; for Wolff updates it
+        is the number of clusters that visits that many sites on average, and for
+        Swendsen-Wang one update of every cluster. On the accelerated
+        path all sweeps run inside a single compiled call; with
+        ``SweepOrder.CHECKERBOARD`` and ``LatticeStorage.MULTISPIN`` that call
+        uses ``num_processes`` threads.
+        """
+        n_sites = self.n_sites
+        if self.storage == LatticeStorage.MULTISPIN:
+            numba.set_num_threads(self.num_threads)
+            self._acceptance_table()
+            self.accepted_moves += multispin.multispin_sweep_numba(self.packed, self._digits, n_sweeps)
+            self.total_moves += n_sweeps * n_sites
+            self.energy, self.magnetization = multispin.multispin_observables_numba(self.packed)
+        elif self.update_rule == UpdateRule.WOLFF:
+            self._wolff_sweeps(n_sweeps)
+        elif self.update_rule in _SWENDSEN_WANG_RULES:
+            self._swendsen_wang_sweeps(n_sweeps)
+        elif self.update_rule == UpdateRule.WANG_LANDAU:
+            self._wang_landau_sweeps(n_sweeps)
+        elif self.update_rule == UpdateRule.MULTICANONICAL:
+            self._multicanonical_sweeps(n_sweeps)
+        elif self.use_acceleration and self.update_rule in _LOCAL_RULES:
+            self._local_sweeps(self.sweep_order, n_sweeps)
+        else:
+            for _ in range(n_sweeps * n_sites):
+                self._update_step()
+        self.sweep_count += n_sweeps
+                
     def run(
         self,
         steps: int = 1000,
-        plot_interval: int = 100,
-        temperature_schedule: Optional[Callable[[int], float]] = None
+        measure_interval: int = 100,
+        temperature_schedule: Optional[Callable[[int], float]] = None,
+        observers: Optional[Iterable[Union[Observer, Callable[['ThermoSimulator'], None]]]] = None,
+        plot_interval: Optional[int] = None
     ) -> None:
-        """Run the simulation."""
-        from viz.plotter import Plotter
-        plotter = Plotter(self)
+        """Run the simulation for ``steps`` sweeps, measuring every ``measure_interval`` sweeps.
         
-        for step in range(steps):
-            if temperature_schedule is not None:
-                self.temperature = temperature_schedule(step)
-            
-            self._update_step()
-            
-            if step % plot_interval == 0:
+        Without a ``temperature_schedule`` the sweeps between two measurements run
+        in one compiled call; with a schedule the temperature is updated every sweep.
+        Runs are headless: after each measurement the ``observers`` (``Observer``
+        instances or plain ``callback(simulator)`` functions) are notified, and
+        visualization is opt-in through ``viz.PlotObserver``, which throttles its
+        redraws by wall-clock time. ``plot_interval`` is the former name of
+        ``measure_interval``.
+        """
+        if plot_interval is not None:
+            measure_interval = plot_interval
+        observers = self._observers(observers)
+        
+        for observer in observers:
+            observer.on_start(self)
+        try:
+            for start in range(0, steps, measure_interval):
+                n_sweeps = min(measure_interval, steps - start)
+                if temperature_schedule is None:
+                    self.sweep(n_sweeps)
+                else:
+                    for step in range(start, start + n_sweeps):
+                        self.temperature = temperature_schedule(step)
+                        self.sweep(1)
+                
                 self.metrics.update(self)
-                plotter.update()
+                for observer in observers:
+                    observer.on_measurement(self)
+        finally:
+            for observer in observers:
+                observer.on_finish(self)
                 
+    @staticmethod
+    def _observers(
+        observers: Optional[Iterable[Union[Observer, Callable[['ThermoSimulator'], None]]]]
+    ) -> List[Observer]:
+        """Wrap plain callbacks as observers."""
+        return [
+            observer if isinstance(observer, Observer) else CallbackObserver(observer)
+            for observer in (observers or ())
+        ]
+        
+    def run_adaptive(
+        self,
+        target_error: float,
+        observable: str = 'energy',
+        max_sweeps: int = 1000000,
+        thermalization_factor: float = 20.0,
+        spacing_factor: float = 2.0,
+        observers: Optional[Iterable[Union[Observer, Callable[['ThermoSimulator'], None]]]] = None
+    ) -> Dict[str, Any]:
+        """Thermalize and measure until the mean ``observable`` per site has error ``target_error``.
+        
+        Thermalization runs chunks of doubling length, recording E and ``|M|``
+        after every sweep, until a chunk spans ``thermalization_factor``
+        integrated autocorrelation times estimated from that chunk, and that
+        estimate is at most ``_TAU_PLATEAU`` times the previous chunk's (a
+        chunk too short for ``tau_int`` underestimates it, and drift while
+        still thermalizing inflates it). The metric statistics then restart and measurements are spaced
+        ``spacing_factor`` autocorrelation times apart. The run stops once
+        the blocking error of the mean ``observable`` (``'energy'`` or
+        ``'magnetization'``, meaning ``|M|``) per site is at most
+        ``target_error`` and its estimate has converged, or after
+        ``max_sweeps`` sweeps in total. Returns the sweeps spent, the
+        measurement interval, ``tau_int`` in sweeps, the reached error and
+        whether the target was met.
+        """
+        from .thermodynamics import Blocking
+        if observable not in ('energy', 'magnetization'):
+            raise ValueError(f"Unsupported observable: {observable}")
+        n_sites = self.n_sites
+        sweeps = 0
+        chunk = _MIN_THERMALIZATION
+        tau = previous = float('nan')
+        while sweeps < max_sweeps:
+            chunk = min(chunk, max_sweeps - sweeps)
+            energy, magnetization = Blocking(), Blocking()
+            for _ in range(chunk):
+                self.sweep(1)
+                energy.push(float(self.energy))
+                magnetization.push(abs(float(self.magnetization)))
+            sweeps += chunk
+            tau = float(np.fmax(energy.tau(), magnetization.tau()))
+            if chunk >= thermalization_factor * tau and tau <= _TAU_PLATEAU * previous:
+                break
+            previous = tau
+            chunk *= 2
+        thermalization = sweeps
+        
+        interval = max(1, int(np.ceil(spacing_factor * tau))) if np.isfinite(tau) else 1
+        self.metrics.reset_statistics()
+        blocking = self.metrics.energy_blocking if observable == 'energy' else self.metrics.magnetization_blocking
+        reached = False
+        observers = self._observers(observers)
+        for observer in observers:
+            observer.on_start(self)
+        try:
+            while sweeps < max_sweeps and not reached:
+                n_sweeps = min(interval, max_sweeps - sweeps)
+                self.sweep(n_sweeps)
+                sweeps += n_sweeps
+                self.metrics.update(self)
+                for observer in observers:
+                    observer.on_measurement(self)
+                reached = blocking.converged and blocking.error() / n_sites <= target_error
+        finally:
+            for observer in observers:
+                observer.on_finish(self)
+        return {
+            'thermalization_sweeps': thermalization,
+            'measure_interval': interval,
+            'sweeps': sweeps,
+            'measurements': blocking.count,
+            'tau_int': self.metrics.autocorrelation_time() * interval,
+            'error': blocking.error() / n_sites,
+            'converged': reached,
+        }
+        
+    def iterate(
+        self,
+        sweeps_per_sample: int = 1,
+        n_samples: Optional[int] = None,
+        include_grid: bool = False,
+        record_metrics: bool = False
+    ) -> Iterator[Sample]:
+        """Yield a :class:`Sample` after every ``sweeps_per_sample`` sweeps.
+        
+        The generator is lazy: no sweep runs until the consumer asks for the
+        next sample, so a slow writer or analyzer downstream throttles the
+        simulation instead of samples piling up in memory. Iteration stops
+        after ``n_samples`` samples, or never if it is None.
+        
+        With ``include_grid`` each sample carries a read-only view of the live
+        lattice (an unpacked copy for multispin storage); it changes with the
+        next sweep, so copy it to keep it. ``acceptance_rate`` covers the
+        sweeps since the previous sample. ``record_metrics`` also feeds every
+        sample into ``self.metrics``.
+        """
+        count = 0
+        while n_samples is None or count < n_samples:
+            accepted, total = self.accepted_moves, self.total_moves
+            self.sweep(sweeps_per_sample)
+            if record_metrics:
+                self.metrics.update(self)
+            
+            grid = None
+            if include_grid:
+                grid = self.grid.view()
+                grid.flags.writeable = False
+            yield Sample(
+                sweep=self.sweep_count,
+                temperature=self.temperature,
+                energy=self.energy,
+                magnetization=int(self.magnetization),
+                acceptance_rate=(self.accepted_moves - accepted) / max(1, self.total_moves - total),
+                grid=grid
+            )
+            count += 1
+
+    def anneal(
+        self, temperatures: Iterable[float], sweeps_per_temperature: int = 1
+    ) -> Tuple[float, np.ndarray]:
+        """Sweep through a cooling schedule and return the lowest energy seen and its configuration.
+
+        Each temperature gets ``sweeps_per_temperature`` sweeps in one compiled
+        call, and the energy is checked after every step. For QUBO problems
+        (see :func:`engine.problems.qubo_lattice`) the energy is the objective;
+        convert the configuration with :func:`engine.problems.to_binary`.
+        """
+        best_energy = self.energy
+        best_grid = self.grid.copy()
+        for temperature in temperatures:
+            self.temperature = temperature
+            self.sweep(sweeps_per_temperature)
+            if self.energy < best_energy:
+                best_energy = self.energy
+                best_grid = self.grid.copy()
+        return best_energy, best_grid
+
     def save_state(self, filename: str, format: str = 'h5'):
         """Save simulation state."""
         self.state_manager.save(self, filename, format)
@@ -0,0 +1,91 @@
+"""FFT-based spin-spin correlations: structure factor, correlation function and length."""
+
+from typing import Sequence, Tuple
+import numpy as np
+
+# numpy.fft writes into preallocated outputs from NumPy 2.0 on
+_FFT_OUT = np.lib.NumpyVersion(np.__version__) >= '2.0.0'
+
+class CorrelationAccumulator:
+    """Structure factor ``S(k) = <|sum_r s_r exp(-i k r)|^2> / N`` accumulated over snapshots.
+
+    Every snapshot costs one real FFT of the spin array, O(N log N), into
+    work buffers allocated once. The array is treated as periodic along
+    every axis, so on other boundaries the results are those of the
+    periodically continued configuration. Spectra use the ``numpy.fft.rfftn``
+    layout: the last axis holds the non-negative wavevectors only.
+    """
+
+    def __init__(self, shape: Sequence[int]):
+        """Allocate the buffers for spin arrays of ``shape``."""
+        self.shape = tuple(int(n) for n in shape)
+        self.n_sites = int(np.prod(self.shape))
+        spectrum_shape = self.shape[:-1] + (self.shape[-1] // 2 + 1,)
+        self._spins = np.empty(self.shape)
+        self._transform = np.empty(spectrum_shape, dtype=np.complex128)
+        self._power = np.empty(spectrum_shape)
+        self._sum = np.zeros(spectrum_shape)
+        self.count = 0
+
+    def add(self, grid: np.ndarray) -> None:
+        """Accumulate the power spectrum of one snapshot."""
+        np.copyto(self._spins, grid)
+        if _FFT_OUT:
+            np.fft.rfftn(self._spins, out=self._transform)
+        else:
+            self._transform[...] = np.fft.rfftn(self._spins)
+        np.abs(self._transform, out=self._power)
+        np.square(self._power, out=self._power)
+        self._sum += self._power
+        self.count += 1
+
+    def reset(self) -> None:
+        """Discard the accumulated snapshots."""
+        self._sum[:] = 0.0
+        self.count = 0
+
+    def structure_factor(self) -> np.ndarray:
+        """Mean ``S(k)`` over the snapshots (``S(0) = <M^2> / N``)."""
+        return self._sum / (max(1, self.count) * self.n_sites)
+
+    def correlation_function(self) -> np.ndarray:
+        """``C(r) = <s_0 s_r>`` averaged over sites and snapshots, indexed by the displacement."""
+        return np.fft.irfftn(self.structure_factor(), s=self.shape)
+
+    def radial_correlation(self) -> Tuple[np.ndarray, np.ndarray]:
+        """``(r, C(r))`` averaged over displacements of equal minimum-image length, rounded to integers."""
+        correlation = self.correlation_function()
+        squared = np.zeros(self.shape)
+        for axis, length in enumerate(self.shape):
+            offsets = np.arange(length)
+            offsets = np.minimum(offsets, length - offsets) ** 2
+            squared += offsets.reshape((-1,) + (1,) * (len(self.shape) - axis - 1))
+        distance = np.rint(np.sqrt(squared)).astype(np.int64).reshape(-1)
+        counts = np.bincount(distance)
+        sums = np.bincount(distance, weights=correlation.reshape(-1))
+        present = np.flatnonzero(counts)
+        return present, sums[present] / counts[present]
+
+    def minimum_wavevector_peak(self) -> float:
+        """``S(k_min)`` averaged over the axes, at the smallest nonzero wavevector ``2 pi / L``."""
+        spectrum = self.structure_factor()
+        values = [spectrum[tuple(1 if a == axis else 0 for a in range(spectrum.ndim))]
+                  for axis, length in enumerate(self.shape) if length > 1]
+        return float(np.mean(values)) if values else 0.0
+
+    def correlation_length(self) -> float:
+        """Second-moment correlation length, averaged over the axes.
+
+        ``xi = sqrt(S(0) / S(k_min) - 1) / (2 sin(k_min / 2))`` along every
+        axis with ``k_min = 2 pi / L``; zero when ``S(0) <= S(k_min)``.
+        """
+        spectrum = self.structure_factor()
+        zero = spectrum.flat[0]
+        lengths = []
+        for axis, length in enumerate(self.shape):
+            if length < 2:
+                continue
+            peak = spectrum[tuple(1 if a == axis else 0 for a in range(spectrum.ndim))]
+            ratio = zero / peak if peak > 0 else 0.0
+            lengths.append(np.sqrt(ratio - 1.0) / (2.0 * np.sin(np.pi / length)) if ratio > 1.0 else 0.0)
+        return float(np.mean(lengths)) if lengths else 0.0
@@ -27,4 +27,16 @@ class UpdateRule(Enum):
     FORTUN_KASTELEYN = "fortun_kasteleyn"
     WANG_LANDAU = "wang_landau"
     PARALLEL_TEMPERING = "parallel_tempering"
-    MULTICANONICAL = "multicanonical" 
\ No newline at end of file
+    MULTICANONICAL = "multicanonical"
+
+class SweepOrder(Enum):
+    """Site visiting order for single-spin sweeps."""
+    RANDOM = "random"
+    SEQUENTIAL = "sequential"
+    CHECKERBOARD = "checkerboard"
+    N_FOLD_WAY = "n_fold_way"
+
+class LatticeStorage(Enum):
+    """In-memory representation of the spin lattice."""
+    INT8 = "int8"
+    MULTISPIN = "multispin"
\ No newline at end of file
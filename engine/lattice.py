@@ -0,0 +1,379 @@
+"""Precomputed neighbour structures for lattice kernels."""
+
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+import numpy as np
+from numba import jit, prange
+
+from .enums import BoundaryCondition
+
+EDGES = ('left', 'right', 'top', 'bottom')
+
+def edge_conditions(
+    boundary: BoundaryCondition,
+    mixed_config: Optional[Dict[str, BoundaryCondition]] = None
+) -> Dict[str, BoundaryCondition]:
+    """Boundary condition of every edge; ``MIXED`` takes them from ``mixed_config``.
+
+    Edges missing from ``mixed_config`` are periodic.
+    """
+    if boundary != BoundaryCondition.MIXED:
+        return {edge: boundary for edge in EDGES}
+    config = mixed_config or {}
+    unknown = set(config) - set(EDGES)
+    if unknown:
+        raise ValueError(f"Unknown edges in mixed_boundary_config: {sorted(unknown)}")
+    edges = {edge: config.get(edge, BoundaryCondition.PERIODIC) for edge in EDGES}
+    if BoundaryCondition.MIXED in edges.values():
+        raise ValueError("Edges of a mixed boundary cannot themselves be mixed")
+    return edges
+
+def _wrap_axis(
+    index: np.ndarray,
+    neighbours: np.ndarray,
+    couplings: np.ndarray,
+    frozen: np.ndarray,
+    low: BoundaryCondition,
+    high: BoundaryCondition,
+    columns: Tuple[int, int],
+    rng: np.random.Generator
+) -> None:
+    """Apply the conditions of two opposite edges to the wrap bonds along the last axis.
+
+    The arrays are views with the wrapped axis last; ``columns`` are the
+    forward and backward neighbour columns of that axis. A wrap bond is
+    missing if either edge is open, reflected across the other axis if
+    either edge is twisted, and has coupling -1 if either edge is
+    anti-periodic or a random sign if either edge is random. Fixed edges
+    keep their wrap bond but never update.
+    """
+    forward, backward = columns
+    pair = (low, high)
+    if BoundaryCondition.TWISTED in pair:
+        neighbours[:, -1, forward] = index[::-1, 0]
+        neighbours[:, 0, backward] = index[::-1, -1]
+
+    if BoundaryCondition.OPEN in pair:
+        signs = np.zeros(index.shape[0], dtype=np.int8)
+    elif BoundaryCondition.ANTI_PERIODIC in pair:
+        signs = -np.ones(index.shape[0], dtype=np.int8)
+    elif BoundaryCondition.RANDOM in pair:
+        signs = rng.choice(np.array([-1, 1], dtype=np.int8), size=index.shape[0])
+    else:
+        signs = np.ones(index.shape[0], dtype=np.int8)
+    couplings[:, -1, forward] = signs
+    # The backward link of a wrap bond sits on the site the forward link points to
+    couplings[:, 0, backward] = signs[::-1] if BoundaryCondition.TWISTED in pair else signs
+
+    if low == BoundaryCondition.FIXED:
+        frozen[:, 0] = True
+    if high == BoundaryCondition.FIXED:
+        frozen[:, -1] = True
+
+def rectangular_table(
+    rows: int,
+    cols: int,
+    boundary: BoundaryCondition,
+    mixed_config: Optional[Dict[str, BoundaryCondition]] = None,
+    seed: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Neighbour table of a ``rows`` x ``cols`` rectangular lattice.
+
+    Returns ``(neighbours, couplings, frozen)``: flat site indices of the right,
+    left, down and up neighbours of every site, the coupling of each of those
+    bonds (0 marks a missing bond, -1 an anti-periodic one), and a mask of
+    sites that never update. ``seed`` fixes the signs of random boundaries.
+    """
+    edges = edge_conditions(boundary, mixed_config)
+    index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+    neighbours = np.stack([
+        np.roll(index, -1, axis=1),
+        np.roll(index, 1, axis=1),
+        np.roll(index, -1, axis=0),
+        np.roll(index, 1, axis=0),
+    ], axis=-1)
+    couplings = np.ones((rows, cols, 4), dtype=np.int8)
+    frozen = np.zeros((rows, cols), dtype=np.bool_)
+
+    rng = np.random.default_rng(seed)
+    _wrap_axis(index, neighbours, couplings, frozen, edges['left'], edges['right'], (0, 1), rng)
+    # Vertical edges are handled as the horizontal ones of the transposed lattice
+    _wrap_axis(
+        index.T, neighbours.transpose(1, 0, 2), couplings.transpose(1, 0, 2), frozen.T,
+        edges['top'], edges['bottom'], (2, 3), rng
+    )
+    return neighbours.reshape(-1, 4), couplings.reshape(-1, 4), frozen.reshape(-1)
+
+def _offset_table(
+    shape: Tuple[int, ...], offsets: Sequence[Tuple[int, ...]], periodic: bool
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Neighbour table of a hypercubic array whose bonds are the given coordinate offsets."""
+    index = np.arange(int(np.prod(shape)), dtype=np.int32).reshape(shape)
+    coords = np.indices(shape)
+    axes = tuple(range(len(shape)))
+    neighbours = np.empty(shape + (len(offsets),), dtype=np.int32)
+    couplings = np.ones(shape + (len(offsets),), dtype=np.int8)
+    for k, offset in enumerate(offsets):
+        neighbours[..., k] = np.roll(index, [-o for o in offset], axis=axes)
+        if not periodic:
+            inside = np.ones(shape, dtype=np.bool_)
+            for axis, o in enumerate(offset):
+                moved = coords[axis] + o
+                inside &= (moved >= 0) & (moved < shape[axis])
+            couplings[..., k] = inside
+    return neighbours.reshape(-1, len(offsets)), couplings.reshape(-1, len(offsets))
+
+@jit(nopython=True)
+def _greedy_colors_numba(
+    indptr: np.ndarray, indices: np.ndarray, couplings: np.ndarray, frozen: np.ndarray, max_degree: int
+) -> np.ndarray:
+    """Greedy colouring of the updatable sites in index order; frozen sites get colour -1."""
+    n_sites = indptr.shape[0] - 1
+    colors = np.full(n_sites, -1, dtype=np.int32)
+    # stamp[c] == i marks colour c as taken by a neighbour of site i
+    stamp = np.full(max_degree + 1, -1, dtype=np.int64)
+    for i in range(n_sites):
+        if frozen[i]:
+            continue
+        for p in range(indptr[i], indptr[i + 1]):
+            c = colors[indices[p]]
+            if couplings[p] != 0 and c >= 0:
+                stamp[c] = i
+        c = 0
+        while stamp[c] == i:
+            c += 1
+        colors[i] = c
+    return colors
+
+class Lattice:
+    """Sites and bonds of a spin lattice in compressed sparse row (CSR) form.
+
+    The neighbours of site ``i`` are ``indices[indptr[i]:indptr[i + 1]]`` and
+    ``couplings`` holds the coupling ``J_ij`` of each of those bonds; every
+    bond is stored once from each end. With the optional per-site ``fields``
+    ``h_i`` the energy is ``-sum_<ij> J_ij s_i s_j - sum_i h_i s_i + offset``.
+    Sites are numbered in C order of ``shape``, the shape of the spin array,
+    and ``frozen`` marks sites that never update.
+
+    Integer couplings in [-127, 127] are stored as int8 and run on tabulated
+    acceptance probabilities; real-valued couplings or fields make the
+    lattice ``weighted``, which the simulator handles with a cached local
+    field per site (see :mod:`engine.fields`).
+
+    Build lattices with :meth:`square`, :meth:`rectangular`, :meth:`cubic`,
+    :meth:`triangular`, :meth:`honeycomb` or :meth:`from_graph` and pass them
+    to ``ThermoSimulator(lattice=...)``; :mod:`engine.problems` builds them
+    from Ising and QUBO matrices.
+    """
+
+    def __init__(
+        self,
+        indptr: np.ndarray,
+        indices: np.ndarray,
+        couplings: np.ndarray,
+        shape: Sequence[int],
+        frozen: Optional[np.ndarray] = None,
+        name: str = 'graph',
+        fields: Optional[np.ndarray] = None,
+        offset: float = 0.0
+    ):
+        """Initialize the lattice from its CSR arrays."""
+        self.indptr = np.ascontiguousarray(indptr, dtype=np.int64)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int32)
+        couplings = np.asarray(couplings)
+        integral = np.array_equal(couplings, np.round(couplings)) and np.all(np.abs(couplings) <= 127)
+        self.couplings = np.ascontiguousarray(couplings, dtype=np.int8 if integral else np.float64)
+        self.shape = tuple(int(n) for n in shape)
+        self.name = name
+        self.nodes = None
+        self.offset = float(offset)
+        n_sites = int(np.prod(self.shape, dtype=np.int64))
+        if (self.indptr.shape[0] != n_sites + 1 or self.indices.shape != self.couplings.shape
+                or self.indptr[-1] != self.indices.shape[0]):
+            raise ValueError("CSR arrays do not describe a lattice of the given shape")
+        if frozen is None:
+            frozen = np.zeros(n_sites, dtype=np.bool_)
+        self.frozen = np.ascontiguousarray(frozen, dtype=np.bool_).reshape(-1)
+        self.fields = None
+        if fields is not None:
+            self.fields = np.ascontiguousarray(fields, dtype=np.float64).reshape(-1)
+            if self.fields.shape[0] != n_sites:
+                raise ValueError(f"Expected {n_sites} fields, got {self.fields.shape[0]}")
+
+        degrees = np.diff(self.indptr)
+        rows = np.repeat(np.arange(n_sites), degrees)
+        strengths = np.bincount(rows, weights=np.abs(self.couplings), minlength=n_sites)
+        self.max_degree = int(degrees.max(initial=0))
+        # Bounds the integer local fields of the acceptance tables
+        self.max_field = int(np.ceil(strengths.max(initial=0)))
+        self._active = None
+        self._colors = None
+
+    @property
+    def n_sites(self) -> int:
+        """Number of sites."""
+        return self.indptr.shape[0] - 1
+
+    @property
+    def weighted(self) -> bool:
+        """Whether couplings are real-valued or fields are present."""
+        return self.couplings.dtype != np.int8 or self.fields is not None
+
+    @property
+    def n_bonds(self) -> int:
+        """Number of bonds (each stored twice in the CSR arrays)."""
+        return self.indices.shape[0] // 2
+
+    def active_sites(self) -> np.ndarray:
+        """Cached indices of the sites that are not frozen, in increasing order."""
+        if self._active is None:
+            self._active = np.flatnonzero(~self.frozen).astype(np.int32)
+        return self._active
+
+    def color_classes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Cached updatable sites grouped into independent sets of a greedy colouring.
+
+        Returns ``(sites, offsets)`` with the sites of colour ``c`` in
+        ``sites[offsets[c]:offsets[c + 1]]``; no bond joins two sites of one
+        colour, so each class can be updated in parallel. Bipartite lattices
+        numbered in raster order (square, cubic and honeycomb with even
+        periodic sizes) get the two checkerboard colours; other lattices get
+        a few more.
+        """
+        if self._colors is None:
+            colors = _greedy_colors_numba(
+                self.indptr, self.indices, self.couplings, self.frozen, self.max_degree
+            )
+            active = colors >= 0
+            counts = np.bincount(colors[active], minlength=1)
+            sites = np.flatnonzero(active)[np.argsort(colors[active], kind='stable')]
+            offsets = np.zeros(counts.shape[0] + 1, dtype=np.int64)
+            offsets[1:] = np.cumsum(counts)
+            self._colors = sites.astype(np.int32), offsets
+        return self._colors
+
+    @classmethod
+    def from_table(
+        cls,
+        neighbours: np.ndarray,
+        couplings: np.ndarray,
+        shape: Sequence[int],
+        frozen: Optional[np.ndarray] = None,
+        name: str = 'graph'
+    ) -> 'Lattice':
+        """Lattice from a dense ``(n_sites, k)`` neighbour table; zero couplings are dropped."""
+        keep = couplings != 0
+        indptr = np.zeros(neighbours.shape[0] + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(keep.sum(axis=1))
+        return cls(indptr, neighbours[keep], couplings[keep], shape, frozen, name)
+
+    @classmethod
+    def rectangular(
+        cls,
+        rows: int,
+        cols: int,
+        boundary: BoundaryCondition = BoundaryCondition.PERIODIC,
+        mixed_config: Optional[Dict[str, BoundaryCondition]] = None,
+        seed: Optional[int] = None
+    ) -> 'Lattice':
+        """``rows`` x ``cols`` square-lattice patch with any boundary condition."""
+        neighbours, couplings, frozen = rectangular_table(rows, cols, boundary, mixed_config, seed)
+        return cls.from_table(neighbours, couplings, (rows, cols), frozen, name='rectangular')
+
+    @classmethod
+    def square(
+        cls,
+        size: int,
+        boundary: BoundaryCondition = BoundaryCondition.PERIODIC,
+        mixed_config: Optional[Dict[str, BoundaryCondition]] = None,
+        seed: Optional[int] = None
+    ) -> 'Lattice':
+        """``size`` x ``size`` square lattice with any boundary condition."""
+        lattice = cls.rectangular(size, size, boundary, mixed_config, seed)
+        lattice.name = 'square'
+        return lattice
+
+    @classmethod
+    def cubic(cls, shape: Union[int, Sequence[int]], periodic: bool = True) -> 'Lattice':
+        """Simple cubic lattice of ``shape`` (an int for L x L x L) with six neighbours per site."""
+        shape = (shape,) * 3 if np.isscalar(shape) else tuple(shape)
+        if len(shape) != 3:
+            raise ValueError("A cubic lattice needs three dimensions")
+        offsets = ((0, 0, 1), (0, 0, -1), (0, 1, 0), (0, -1, 0), (1, 0, 0), (-1, 0, 0))
+        neighbours, couplings = _offset_table(shape, offsets, periodic)
+        return cls.from_table(neighbours, couplings, shape, name='cubic')
+
+    @classmethod
+    def triangular(cls, rows: int, cols: int, periodic: bool = True) -> 'Lattice':
+        """Triangular lattice in axial coordinates: the square bonds plus one diagonal."""
+        offsets = ((0, 1), (0, -1), (1, 0), (-1, 0), (1, -1), (-1, 1))
+        neighbours, couplings = _offset_table((rows, cols), offsets, periodic)
+        return cls.from_table(neighbours, couplings, (rows, cols), name='triangular')
+
+    @classmethod
+    def honeycomb(cls, rows: int, cols: int, periodic: bool = True) -> 'Lattice':
+        """Honeycomb lattice in the brick-wall representation.
+
+        Every site is bonded to its left and right neighbours and to the site
+        below it if its row plus column is even, above it otherwise. Periodic
+        lattices need an even number of rows and columns.
+        """
+        if periodic and (rows % 2 or cols % 2):
+            raise ValueError("A periodic honeycomb lattice needs an even number of rows and columns")
+        index = np.arange(rows * cols, dtype=np.int32).reshape(rows, cols)
+        i, j = np.indices((rows, cols))
+        vertical = np.where((i + j) % 2 == 0, 1, -1)
+        neighbours = np.stack([
+            np.roll(index, -1, axis=1),
+            np.roll(index, 1, axis=1),
+            index[(i + vertical) % rows, j],
+        ], axis=-1)
+        couplings = np.ones((rows, cols, 3), dtype=np.int8)
+        if not periodic:
+            couplings[:, -1, 0] = 0
+            couplings[:, 0, 1] = 0
+            couplings[..., 2] = (i + vertical >= 0) & (i + vertical < rows)
+        return cls.from_table(neighbours.reshape(-1, 3), couplings.reshape(-1, 3), (rows, cols), name='honeycomb')
+
+    @classmethod
+    def from_graph(cls, graph: Any, weight: Optional[str] = None) -> 'Lattice':
+        """Lattice of an undirected ``networkx`` graph.
+
+        Sites follow the order of ``graph.nodes``, which is kept in ``nodes``.
+        Couplings are 1, or the edge attribute ``weight`` (default 1).
+        """
+        nodes = list(graph.nodes)
+        position = {node: n for n, node in enumerate(nodes)}
+        rows, cols, values = [], [], []
+        for u, v, data in graph.edges(data=True):
+            if u == v:
+                raise ValueError(f"Self-loop at node {u!r} is not supported")
+            coupling = data.get(weight, 1) if weight is not None else 1
+            a, b = position[u], position[v]
+            rows += [a, b]
+            cols += [b, a]
+            values += [coupling] * 2
+
+        n_sites = len(nodes)
+        rows = np.array(rows, dtype=np.int64)
+        order = np.argsort(rows, kind='stable')
+        indptr = np.zeros(n_sites + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(rows, minlength=n_sites))
+        lattice = cls(
+            indptr, np.array(cols, dtype=np.int32)[order], np.array(values, dtype=np.float64)[order],
+            (n_sites,), name='graph'
+        )
+        lattice.nodes = nodes
+        return lattice
+
+@jit(nopython=True, parallel=True)
+def lattice_energy_numba(
+    spins: np.ndarray, indptr: np.ndarray, indices: np.ndarray, couplings: np.ndarray
+) -> float:
+    """Energy of a flat spin array from its CSR bonds (each bond counted once)."""
+    energy = 0.0
+    for i in prange(spins.shape[0]):
+        local = 0
+        for p in range(indptr[i], indptr[i + 1]):
+            local += couplings[p] * spins[indices[p]]
+        energy -= 0.5 * spins[i] * local
+    return energy
@@ -0,0 +1,220 @@
+"""Multicanonical sampling with tabulated, iteratively refined weights."""
+
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+from numba import jit
+from scipy.special import logsumexp
+
+from .lattice import Lattice
+from .wang_landau import DensityOfStates, energy_levels
+
+@jit(nopython=True)
+def multicanonical_numba(
+    spins: np.ndarray,
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    couplings: np.ndarray,
+    sites: np.ndarray,
+    energy: int,
+    magnetization: int,
+    e_min: int,
+    step: int,
+    log_w: np.ndarray,
+    histogram: np.ndarray,
+    moments: np.ndarray,
+    n_trials: int
+) -> Tuple[int, int, int]:
+    """Single-spin trials accepted with probability ``min(1, W(E') / W(E))``.
+
+    After every trial the histogram of the current energy level grows and
+    ``M``, ``|M|``, ``M^2`` and ``M^4`` are added to that level's row of
+    ``moments``. Returns ``(energy, magnetization, accepted)``.
+    """
+    level = (energy - e_min) // step
+    accepted = 0
+    for _ in range(n_trials):
+        site = sites[np.random.randint(0, sites.shape[0])]
+        spin = spins[site]
+        field = 0
+        for p in range(indptr[site], indptr[site + 1]):
+            field += couplings[p] * spins[indices[p]]
+        new_level = level + 2 * spin * field // step
+        difference = log_w[new_level] - log_w[level]
+        if difference >= 0.0 or np.random.random() < np.exp(difference):
+            spins[site] = -spin
+            level = new_level
+            magnetization -= 2 * spin
+            accepted += 1
+        histogram[level] += 1
+        m2 = float(magnetization) * magnetization
+        moments[level, 0] += magnetization
+        moments[level, 1] += abs(magnetization)
+        moments[level, 2] += m2
+        moments[level, 3] += m2 * m2
+    return e_min + level * step, magnetization, accepted
+
+class Multicanonical:
+    """Multicanonical weights ``log W(E)`` on the energy levels, with the statistics sampled under them.
+
+    The weights start canonical at ``temperature``. While ``refining``, every
+    ``sweeps_per_iteration`` sweeps end an iteration: the visited levels get
+    ``log W(E) -= log H(E)``, levels beyond the visited range keep their
+    slope, and the histogram restarts. Refinement stops once an iteration's
+    histogram is flat (every visited level at least ``flatness`` times the
+    mean) without the visited range having grown; the statistics gathered
+    from then on are the production histograms used by :meth:`reweight`.
+
+    ``energy_range`` limits the flattened region to ``(E_low, E_high)``,
+    e.g. the canonical energies of the lowest and highest temperature of
+    interest; outside it the weights stay canonical at ``temperature``,
+    which should lie between those temperatures so that the walk is pushed
+    back into the range.
+    """
+
+    def __init__(
+        self,
+        lattice: Lattice,
+        temperature: float,
+        sweeps_per_iteration: int = 1000,
+        flatness: float = 0.5,
+        energy_range: Optional[Tuple[float, float]] = None
+    ):
+        """Tabulate canonical weights at ``temperature`` over every energy level of ``lattice``."""
+        if temperature <= 0:
+            raise ValueError("Multicanonical weights start from a positive temperature")
+        self.lattice = lattice
+        self.e_min, self.step, n_levels = energy_levels(lattice)
+        self.energies = self.e_min + self.step * np.arange(n_levels, dtype=np.float64)
+        self.log_w = -self.energies / temperature
+        self.sweeps_per_iteration = sweeps_per_iteration
+        self.flatness = flatness
+        self.window = (0, n_levels - 1)
+        if energy_range is not None:
+            low = int(np.ceil((energy_range[0] - self.e_min) / self.step))
+            high = int(np.floor((energy_range[1] - self.e_min) / self.step))
+            self.window = (max(low, 0), min(high, n_levels - 1))
+        self.refining = True
+        self.iterations = 0
+        self.histogram = np.zeros(n_levels, dtype=np.int64)
+        self.moments = np.zeros((n_levels, 4))
+        self._iteration_sweeps = 0
+        self._visited_range = (n_levels, -1)
+
+    def use_density_of_states(self, dos: DensityOfStates, refine: bool = False) -> None:
+        """Take ``W(E) = 1 / g(E)`` from a density-of-states estimate (e.g. Wang-Landau).
+
+        Levels outside the estimate keep their current weights, shifted to
+        join it. The statistics restart; pass ``refine=True`` to keep
+        iterating from these weights instead of going straight to production.
+        """
+        levels = np.round((dos.energies - self.e_min) / self.step).astype(np.int64)
+        log_w = self.log_w.copy()
+        log_w[levels] = -dos.log_g
+        self.log_w = self._extend(log_w, levels)
+        self.refining = refine
+        self._reset()
+
+    def _extend(self, log_w: np.ndarray, levels: np.ndarray) -> np.ndarray:
+        """Fill the levels outside ``levels`` from the current weights, keeping their slope."""
+        low, high = levels[0], levels[-1]
+        log_w[:low] = self.log_w[:low] + log_w[low] - self.log_w[low]
+        log_w[high + 1:] = self.log_w[high + 1:] + log_w[high] - self.log_w[high]
+        inside = np.arange(low, high + 1)
+        log_w[inside] = np.interp(inside, levels, log_w[levels])
+        return log_w - log_w[levels].max()
+
+    def _reset(self) -> None:
+        """Discard the sampled statistics."""
+        self.histogram[:] = 0
+        self.moments[:] = 0.0
+        self._iteration_sweeps = 0
+
+    def run(self, spins: np.ndarray, energy: int, magnetization: int, n_sweeps: int) -> Tuple[int, int, int]:
+        """Sweep ``spins`` (flat int8) for ``n_sweeps`` sweeps, ending iterations as they complete.
+
+        Returns ``(energy, magnetization, accepted)``.
+        """
+        lattice = self.lattice
+        sites = lattice.active_sites()
+        accepted = 0
+        while n_sweeps > 0 and sites.shape[0] > 0:
+            chunk = n_sweeps
+            if self.refining:
+                chunk = min(chunk, self.sweeps_per_iteration - self._iteration_sweeps)
+            energy, magnetization, chunk_accepted = multicanonical_numba(
+                spins, lattice.indptr, lattice.indices, lattice.couplings, sites,
+                energy, magnetization, self.e_min, self.step, self.log_w,
+                self.histogram, self.moments, chunk * sites.shape[0]
+            )
+            accepted += chunk_accepted
+            n_sweeps -= chunk
+            self._iteration_sweeps += chunk
+            if self.refining and self._iteration_sweeps >= self.sweeps_per_iteration:
+                self.refine()
+        return energy, magnetization, accepted
+
+    def refine(self) -> bool:
+        """End an iteration: update the weights from its histogram and restart the statistics.
+
+        Returns whether the histogram was flat over an unchanged visited
+        range, in which case refinement stops.
+        """
+        low, high = self.window
+        visited = low + np.flatnonzero(self.histogram[low:high + 1])
+        if visited.shape[0] == 0:
+            return False
+        counts = self.histogram[visited]
+        visited_range = (min(visited[0], self._visited_range[0]), max(visited[-1], self._visited_range[1]))
+        converged = counts.min() >= self.flatness * counts.mean() and visited_range == self._visited_range
+        self._visited_range = visited_range
+
+        log_w = self.log_w.copy()
+        log_w[visited] -= np.log(counts)
+        self.log_w = self._extend(log_w, visited)
+        self.iterations += 1
+        self.refining = not converged
+        self._reset()
+        return converged
+
+    def density_of_states(self) -> DensityOfStates:
+        """``g(E) ~ H(E) / W(E)`` over the visited levels of the current statistics."""
+        visited = np.flatnonzero(self.histogram)
+        return DensityOfStates(
+            self.energies[visited],
+            np.log(self.histogram[visited]) - self.log_w[visited],
+            self.lattice.active_sites().shape[0]
+        )
+
+    def reweight(self, temperatures: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Canonical averages at every temperature from the stored histograms.
+
+        Each visited level is weighted by ``H(E) exp(-E / T) / W(E)``; the
+        magnetization averages use the moments sampled at that level.
+        Returns arrays ``energy``, ``specific_heat``, ``magnetization``,
+        ``abs_magnetization``, ``susceptibility`` and ``binder_cumulant``
+        (whole system) aligned with ``temperature``, defined as in
+        :meth:`engine.reweighting.Reweighting.thermodynamics`
+        (``chi = Var(M) / T``).
+        """
+        temperatures = np.atleast_1d(np.asarray(temperatures, dtype=np.float64))
+        visited = np.flatnonzero(self.histogram)
+        if visited.shape[0] == 0:
+            raise ValueError("No statistics sampled since the last refinement")
+        counts = self.histogram[visited]
+        energies = self.energies[visited]
+        log_weights = (np.log(counts) - self.log_w[visited])[None, :] - energies[None, :] / temperatures[:, None]
+        probabilities = np.exp(log_weights - logsumexp(log_weights, axis=1)[:, None])
+        level_moments = self.moments[visited] / counts[:, None]
+
+        energy = probabilities @ energies
+        energy2 = probabilities @ energies ** 2
+        magnetization, abs_magnetization, magnetization2, magnetization4 = (probabilities @ level_moments).T
+        return {
+            'temperature': temperatures,
+            'energy': energy,
+            'specific_heat': (energy2 - energy ** 2) / temperatures ** 2,
+            'magnetization': magnetization,
+            'abs_magnetization': abs_magnetization,
+            'susceptibility': (magnetization2 - magnetization ** 2) / temperatures,
+            'binder_cumulant': 1 - magnetization4 / (3 * magnetization2 ** 2),
+        }
@@ -0,0 +1,68 @@
+"""Observers notified by ThermoSimulator.run()."""
+
+import time
+from typing import Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .core import ThermoSimulator
+
+class Observer:
+    """Base class for run observers; override the hooks you need."""
+
+    def on_start(self, simulator: 'ThermoSimulator') -> None:
+        """Called once before the first sweep."""
+
+    def on_measurement(self, simulator: 'ThermoSimulator') -> None:
+        """Called after every measurement, once ``simulator.metrics`` is updated."""
+
+    def on_finish(self, simulator: 'ThermoSimulator') -> None:
+        """Called once when the run ends, also when it ends with an exception."""
+
+class CallbackObserver(Observer):
+    """Adapts a plain ``callback(simulator)`` function to the observer interface."""
+
+    def __init__(self, callback: Callable[['ThermoSimulator'], None]):
+        """Initialize the observer."""
+        self.callback = callback
+
+    def on_measurement(self, simulator: 'ThermoSimulator') -> None:
+        """Invoke the callback."""
+        self.callback(simulator)
+
+class ThrottledObserver(Observer):
+    """Forwards measurements to another observer at most once per ``min_interval`` seconds.
+
+    Throttling is by wall-clock time, so an expensive observer such as a live
+    plot costs the same whether measurements are frequent or rare. The last
+    state is always forwarded when the run finishes.
+    """
+
+    def __init__(self, observer: Observer, min_interval: float = 0.5):
+        """Initialize the observer."""
+        self.observer = observer
+        self.min_interval = min_interval
+        self._last_time = None
+        self._pending = False
+
+    def on_start(self, simulator: 'ThermoSimulator') -> None:
+        """Forward the start of the run."""
+        self._last_time = None
+        self._pending = False
+        self.observer.on_start(simulator)
+
+    def on_measurement(self, simulator: 'ThermoSimulator') -> None:
+        """Forward the measurement if ``min_interval`` has elapsed since the last one."""
+        now = time.perf_counter()
+        if self._last_time is not None and now - self._last_time < self.min_interval:
+            self._pending = True
+            return
+        self._last_time = now
+        self._pending = False
+        self.observer.on_measurement(simulator)
+
+    def on_finish(self, simulator: 'ThermoSimulator') -> None:
+        """Forward a skipped final measurement, then the end of the run."""
+        if self._pending:
+            self._pending = False
+            self.observer.on_measurement(simulator)
+        self.observer.on_finish(simulator)
@@ -0,0 +1,102 @@
+"""Ising and QUBO optimization problems as CSR lattices."""
+
+import os
+from typing import Any, Optional, Tuple
+import numpy as np
+from scipy import sparse
+
+from .lattice import Lattice
+
+def ising_lattice(J: Any, h: Optional[np.ndarray] = None, offset: float = 0.0) -> Lattice:
+    """Lattice of the Ising problem ``E(s) = -s^T J s / 2 - h^T s + offset``.
+
+    ``J`` is a square dense or ``scipy.sparse`` matrix; the coupling of a pair
+    is ``(J[i, j] + J[j, i]) / 2``, so a symmetric ``J`` gives every pair its
+    entry once. The constant diagonal contribution is folded into ``offset``.
+    """
+    matrix = sparse.coo_matrix(J, dtype=np.float64)
+    n_sites = matrix.shape[0]
+    if matrix.shape != (n_sites, n_sites):
+        raise ValueError(f"Coupling matrix must be square, got shape {matrix.shape}")
+    diagonal = matrix.row == matrix.col
+    offset -= 0.5 * matrix.data[diagonal].sum()
+
+    half = sparse.coo_matrix(
+        (0.5 * matrix.data[~diagonal], (matrix.row[~diagonal], matrix.col[~diagonal])),
+        shape=matrix.shape
+    )
+    symmetric = (half + half.T).tocsr()
+    symmetric.sum_duplicates()
+    symmetric.eliminate_zeros()
+    symmetric.sort_indices()
+    fields = None if h is None else np.asarray(h, dtype=np.float64)
+    return Lattice(
+        symmetric.indptr, symmetric.indices, symmetric.data, (n_sites,),
+        name='ising', fields=fields, offset=offset
+    )
+
+def qubo_lattice(Q: Any, offset: float = 0.0) -> Lattice:
+    """Lattice whose energy equals the QUBO objective ``x^T Q x + offset``.
+
+    Binary variables map to spins as ``x = (1 + s) / 2`` (see
+    :func:`to_binary`), giving couplings ``-(Q_ij + Q_ji) / 4``, fields
+    ``-sum_j (Q_ij + Q_ji) / 4`` and a constant offset, so minimizing the
+    lattice energy, e.g. by annealing, minimizes the objective.
+    """
+    matrix = sparse.csr_matrix(Q, dtype=np.float64)
+    n_sites = matrix.shape[0]
+    if matrix.shape != (n_sites, n_sites):
+        raise ValueError(f"QUBO matrix must be square, got shape {matrix.shape}")
+    symmetric = 0.5 * (matrix + matrix.T)
+    row_sums = np.asarray(symmetric.sum(axis=1)).ravel()
+    pairs = symmetric - sparse.diags(symmetric.diagonal())
+    offset += 0.25 * (matrix.sum() + matrix.diagonal().sum())
+    lattice = ising_lattice(-0.5 * pairs, h=-0.5 * row_sums, offset=offset)
+    lattice.name = 'qubo'
+    return lattice
+
+def to_binary(spins: np.ndarray) -> np.ndarray:
+    """QUBO assignment ``x = (1 + s) / 2`` of a spin configuration."""
+    return (np.asarray(spins) > 0).astype(np.int8)
+
+def _read_triplets(filename: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Read ``i j value`` lines, skipping blanks, ``#``/``c`` comments and ``p`` headers."""
+    rows, cols, values = [], [], []
+    with open(filename) as f:
+        for line in f:
+            parts = line.split()
+            if not parts or parts[0][0] in '#cp':
+                continue
+            rows.append(int(parts[0]))
+            cols.append(int(parts[1]))
+            values.append(float(parts[2]))
+    return np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64), np.array(values)
+
+def load_problem(filename: str, kind: Optional[str] = None) -> Lattice:
+    """Load an optimization problem from a text file of 0-based ``i j value`` lines.
+
+    ``kind`` is ``'qubo'`` (the qbsolv ``.qubo`` format: entries of ``Q``,
+    diagonal included) or ``'ising'`` (coupling ``J_ij`` of each pair given
+    once, and field ``h_i`` on lines ``i i h_i``); by default it follows the
+    file extension, ``.qubo`` or anything else for Ising. The number of
+    variables is one more than the largest index.
+    """
+    if kind is None:
+        kind = 'qubo' if os.path.splitext(filename)[1] == '.qubo' else 'ising'
+    if kind not in ('qubo', 'ising'):
+        raise ValueError(f"Unknown problem kind: {kind}")
+    rows, cols, values = _read_triplets(filename)
+    n_sites = int(max(rows.max(initial=-1), cols.max(initial=-1))) + 1
+    if kind == 'qubo':
+        return qubo_lattice(sparse.coo_matrix((values, (rows, cols)), shape=(n_sites, n_sites)))
+
+    diagonal = rows == cols
+    h = np.bincount(rows[diagonal], weights=values[diagonal], minlength=n_sites)
+    pairs = ~diagonal
+    # Each listed pair appears once; -s^T J s / 2 needs it on both sides of the diagonal
+    J = sparse.coo_matrix(
+        (np.concatenate([values[pairs], values[pairs]]),
+         (np.concatenate([rows[pairs], cols[pairs]]), np.concatenate([cols[pairs], rows[pairs]]))),
+        shape=(n_sites, n_sites)
+    )
+    return ising_lattice(J, h)
@@ -0,0 +1,155 @@
+"""Raw binary snapshot format that is loaded by memory mapping.
+
+A file starts with an 8-byte magic string and the byte length of a JSON
+header, followed by the header itself (space padded) and the array payloads.
+Every payload starts at a multiple of ``ALIGNMENT`` bytes, so opening a file
+maps its arrays with ``np.memmap`` in O(1) and pages are only read when they
+are touched. The header lists the ``dtype``, ``shape`` and ``offset`` of
+every array plus free-form JSON ``attrs``.
+"""
+
+import json
+import os
+import struct
+from typing import Any, Dict, Optional, Sequence, Tuple
+import numpy as np
+
+MAGIC = b'XTRAW\x00\x01\x00'
+ALIGNMENT = 4096
+_PREFIX = len(MAGIC) + 8
+
+def _align(offset: int) -> int:
+    """Round ``offset`` up to the payload alignment."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+def _encode_header(header: Dict[str, Any], size: int) -> bytes:
+    """Prefix and JSON header, padded to ``size`` bytes."""
+    text = json.dumps(header).encode()
+    if _PREFIX + len(text) > size:
+        raise ValueError("Raw header does not fit in its reserved space")
+    return MAGIC + struct.pack('<Q', size - _PREFIX) + text.ljust(size - _PREFIX)
+
+def _read_header(f) -> Dict[str, Any]:
+    """Parse the header of an open raw file."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{f.name} is not a raw snapshot file")
+    (length,) = struct.unpack('<Q', f.read(8))
+    return json.loads(f.read(length))
+
+def write_raw(filename: str, arrays: Dict[str, np.ndarray], attrs: Optional[Dict[str, Any]] = None) -> None:
+    """Write named arrays and JSON attributes to a raw file."""
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    entries = {
+        name: {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': 0}
+        for name, array in arrays.items()
+    }
+    header = {'arrays': entries, 'attrs': attrs or {}}
+
+    # Offsets depend on the header size; grow the reserved header until it fits
+    header_size = ALIGNMENT
+    while True:
+        offset = header_size
+        for name, array in arrays.items():
+            entries[name]['offset'] = offset
+            offset = _align(offset + array.nbytes)
+        try:
+            encoded = _encode_header(header, header_size)
+            break
+        except ValueError:
+            header_size += ALIGNMENT
+
+    with open(filename, 'wb') as f:
+        f.write(encoded)
+        end = header_size
+        for name, array in arrays.items():
+            f.seek(entries[name]['offset'])
+            f.write(array.data)
+            end = entries[name]['offset'] + array.nbytes
+        f.truncate(end)
+
+def read_raw(filename: str, mode: str = 'r') -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+    """Memory-map the arrays of a raw file; returns ``(arrays, attrs)``.
+
+    ``mode`` is passed to ``np.memmap``: ``'r'`` for read-only views, ``'c'``
+    for private copy-on-write views and ``'r+'`` to modify the file in place.
+    """
+    with open(filename, 'rb') as f:
+        header = _read_header(f)
+    arrays = {}
+    for name, entry in header['arrays'].items():
+        shape = tuple(entry['shape'])
+        dtype = np.dtype(entry['dtype'])
+        if np.prod(shape, dtype=np.int64) == 0:
+            arrays[name] = np.empty(shape, dtype=dtype)
+        else:
+            arrays[name] = np.memmap(filename, dtype=dtype, mode=mode, offset=entry['offset'], shape=shape)
+    return arrays, header['attrs']
+
+class RawArchive:
+    """Append-only raw file of equally shaped frames, e.g. a lattice trajectory.
+
+    Frames are written straight to the end of the file; the header, which
+    has a fixed reserved size, is rewritten with the frame count on
+    :meth:`flush` and :meth:`close`. Open the result with :func:`read_raw`:
+    the ``frames`` array is a memory map, so single snapshots are sliced out
+    of large archives without reading the rest.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        frame_shape: Sequence[int],
+        dtype: Any = np.int8,
+        attrs: Optional[Dict[str, Any]] = None,
+        header_size: int = ALIGNMENT
+    ):
+        """Create the archive."""
+        self.filename = filename
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+        self.attrs = attrs or {}
+        self.n_frames = 0
+        self._header_size = _align(header_size)
+        self._file = open(filename, 'wb')
+        self._write_header()
+
+    def _write_header(self) -> None:
+        """Rewrite the fixed-size header with the current frame count."""
+        header = {
+            'arrays': {'frames': {
+                'dtype': self.dtype.str,
+                'shape': [self.n_frames, *self.frame_shape],
+                'offset': self._header_size,
+            }},
+            'attrs': self.attrs,
+        }
+        position = self._file.tell()
+        self._file.seek(0)
+        self._file.write(_encode_header(header, self._header_size))
+        self._file.seek(max(position, self._header_size))
+
+    def append(self, frame: np.ndarray) -> None:
+        """Append one frame."""
+        frame = np.ascontiguousarray(frame, dtype=self.dtype)
+        if frame.shape != self.frame_shape:
+            raise ValueError(f"Expected a frame of shape {self.frame_shape}, got {frame.shape}")
+        self._file.write(frame.data)
+        self.n_frames += 1
+
+    def flush(self) -> None:
+        """Record the frames written so far and flush them to disk."""
+        self._write_header()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        """Finalize the header and close the file."""
+        if not self._file.closed:
+            self._write_header()
+            self._file.close()
+
+    def __enter__(self) -> 'RawArchive':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
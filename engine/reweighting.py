@@ -0,0 +1,240 @@
+"""Ferrenberg-Swendsen single- and multi-histogram reweighting of canonical samples."""
+
+from typing import Dict, Optional, Sequence, Tuple, TYPE_CHECKING
+import numpy as np
+from scipy.optimize import brentq
+from scipy.special import logsumexp
+
+if TYPE_CHECKING:
+    from .thermodynamics import SimulationMetrics
+
+# Reweighted temperatures are processed in chunks of at most this many (temperature, state) pairs
+_CHUNK = 1 << 22
+
+class Histogram:
+    """Joint ``(E, M)`` histogram of one canonical run at ``temperature``.
+
+    Samples are compressed to their distinct ``(E, M)`` pairs and counts;
+    a histogram that is already binned is passed with ``counts``.
+    """
+
+    def __init__(
+        self,
+        temperature: float,
+        energies: Sequence[float],
+        magnetizations: Sequence[float],
+        counts: Optional[Sequence[int]] = None
+    ):
+        """Compress the samples (or histogram entries) of one run."""
+        if temperature <= 0:
+            raise ValueError("Reweighting needs runs at positive temperatures")
+        pairs = np.column_stack([
+            np.asarray(energies, dtype=np.float64), np.asarray(magnetizations, dtype=np.float64)
+        ])
+        weights = np.ones(pairs.shape[0]) if counts is None else np.asarray(counts, dtype=np.float64)
+        pairs, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        self.temperature = float(temperature)
+        self.energies = pairs[:, 0]
+        self.magnetizations = pairs[:, 1]
+        self.counts = np.bincount(inverse.reshape(-1), weights=weights, minlength=pairs.shape[0])
+
+    @property
+    def n_samples(self) -> float:
+        """Total number of samples."""
+        return float(self.counts.sum())
+
+    @classmethod
+    def from_metrics(cls, metrics: 'SimulationMetrics', temperature: Optional[float] = None) -> 'Histogram':
+        """Histogram of the samples recorded at ``temperature`` (the last recorded one by default)."""
+        temperatures = metrics.temperature_history.values
+        if temperatures.shape[0] == 0:
+            raise ValueError("No samples recorded")
+        if temperature is None:
+            temperature = temperatures[-1]
+        selected = temperatures == temperature
+        return cls(
+            temperature,
+            metrics.energy_history.values[selected],
+            metrics.magnetization_history.values[selected]
+        )
+
+class Reweighting:
+    """Canonical averages at any temperature from the histograms of one or more runs.
+
+    With one histogram this is single-histogram reweighting. With several
+    runs at different temperatures the weighted histogram analysis method
+    (multi-histogram) solves self-consistently for their free energies
+    ``f_k = log Z_k``::
+
+        g(s) = n(s) / sum_j N_j exp(-f_j - beta_j E_s)
+        f_k  = log sum_s g(s) exp(-beta_k E_s)
+
+    over the pooled distinct states ``s``. All sums are evaluated in log
+    space, so no exponent overflows. Quantities are for the whole system.
+    """
+
+    def __init__(self, histograms: Sequence[Histogram], tolerance: float = 1e-10, max_iterations: int = 100000):
+        """Pool the histograms and solve for the run free energies."""
+        histograms = list(histograms)
+        if not histograms:
+            raise ValueError("Reweighting needs at least one histogram")
+        self.temperatures = np.array([h.temperature for h in histograms])
+        betas = 1.0 / self.temperatures
+        pairs = np.concatenate([np.column_stack([h.energies, h.magnetizations]) for h in histograms])
+        counts = np.concatenate([h.counts for h in histograms])
+        pairs, inverse = np.unique(pairs, axis=0, return_inverse=True)
+        counts = np.bincount(inverse.reshape(-1), weights=counts, minlength=pairs.shape[0])
+        self.energies = pairs[:, 0]
+        self.magnetizations = pairs[:, 1]
+
+        log_counts = np.log(counts)
+        log_samples = np.log([h.n_samples for h in histograms])
+        free_energies = np.zeros(len(histograms))
+        exponents = -betas[None, :] * self.energies[:, None]
+        for _ in range(max_iterations):
+            log_density = log_counts - logsumexp(log_samples - free_energies + exponents, axis=1)
+            updated = logsumexp(log_density[:, None] + exponents, axis=0)
+            updated -= updated[0]
+            converged = np.max(np.abs(updated - free_energies)) < tolerance
+            free_energies = updated
+            if converged:
+                break
+        self.free_energies = free_energies
+        self.log_density = log_counts - logsumexp(log_samples - free_energies + exponents, axis=1)
+
+    def _log_weights(self, betas: np.ndarray) -> np.ndarray:
+        """Unnormalized log probability of every state at every inverse temperature."""
+        return self.log_density[None, :] - betas[:, None] * self.energies[None, :]
+
+    def log_partition_function(self, temperatures: Sequence[float]) -> np.ndarray:
+        """``log Z(T)`` up to a constant shared by all temperatures."""
+        betas = 1.0 / np.atleast_1d(np.asarray(temperatures, dtype=np.float64))
+        return logsumexp(self._log_weights(betas), axis=1)
+
+    def thermodynamics(self, temperatures: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Reweighted ``energy``, ``specific_heat``, ``magnetization``, ``abs_magnetization``,
+        ``susceptibility`` and ``binder_cumulant`` at every temperature.
+
+        The definitions follow :class:`engine.thermodynamics.RunningMoments`:
+        ``C = Var(E) / T^2`` and ``chi = Var(M) / T``.
+        """
+        temperatures = np.atleast_1d(np.asarray(temperatures, dtype=np.float64))
+        observables = np.column_stack([
+            self.energies, self.energies ** 2, self.magnetizations, np.abs(self.magnetizations),
+            self.magnetizations ** 2, self.magnetizations ** 4
+        ])
+        averages = np.empty((temperatures.shape[0], observables.shape[1]))
+        chunk = max(1, _CHUNK // max(1, self.energies.shape[0]))
+        for start in range(0, temperatures.shape[0], chunk):
+            log_weights = self._log_weights(1.0 / temperatures[start:start + chunk])
+            probabilities = np.exp(log_weights - logsumexp(log_weights, axis=1)[:, None])
+            averages[start:start + chunk] = probabilities @ observables
+        energy, energy2, magnetization, abs_magnetization, magnetization2, magnetization4 = averages.T
+        with np.errstate(divide='ignore', invalid='ignore'):
+            binder_cumulant = np.where(magnetization2 > 0, 1 - magnetization4 / (3 * magnetization2 ** 2), 0.0)
+        return {
+            'temperature': temperatures,
+            'energy': energy,
+            'specific_heat': (energy2 - energy ** 2) / temperatures ** 2,
+            'magnetization': magnetization,
+            'abs_magnetization': abs_magnetization,
+            'susceptibility': (magnetization2 - magnetization ** 2) / temperatures,
+            'binder_cumulant': binder_cumulant,
+        }
+
+    def _energy_marginal(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Distinct energies and their log density of states."""
+        energies, inverse = np.unique(self.energies, return_inverse=True)
+        log_density = np.full(energies.shape[0], -np.inf)
+        np.logaddexp.at(log_density, inverse.reshape(-1), self.log_density)
+        return energies, log_density
+
+    def fisher_zeros(
+        self,
+        beta_range: Optional[Tuple[float, float]] = None,
+        imag_max: Optional[float] = None,
+        n_zeros: int = 1,
+        resolution: int = 64
+    ) -> np.ndarray:
+        """Zeros of the reweighted ``Z(beta)`` in the complex inverse-temperature plane.
+
+        ``|Z(b + i c) / Z(b)|`` is scanned on a ``resolution`` square grid over
+        ``beta_range`` and ``0 < c <= imag_max``; its local minima are refined
+        by Newton's method. By default the grid spans the simulated inverse
+        temperatures widened by ``2 / sigma_E`` (the range reweighting can
+        reach) and ``imag_max = 4 / sigma_E``. Returns up to ``n_zeros`` zeros
+        of the upper half plane, nearest to the real axis first.
+        """
+        energies, log_density = self._energy_marginal()
+        energies = energies - energies.mean()
+        betas = 1.0 / self.temperatures
+        if beta_range is None or imag_max is None:
+            middle = 0.5 * (betas.min() + betas.max())
+            sigma = np.sqrt(max(self.thermodynamics([1.0 / middle])['specific_heat'][0], 0.0)) * middle
+            scale = 1.0 / sigma if sigma > 0 else 1.0
+            beta_range = beta_range or (betas.min() - 2 * scale, betas.max() + 2 * scale)
+            imag_max = imag_max or 4 * scale
+        real_axis = np.linspace(beta_range[0], beta_range[1], resolution)
+        imag_axis = np.linspace(0.0, imag_max, resolution + 1)[1:]
+
+        log_weights = log_density[None, :] - real_axis[:, None] * energies[None, :]
+        probabilities = np.exp(log_weights - logsumexp(log_weights, axis=1)[:, None])
+        ratio = np.abs(probabilities @ np.exp(-1j * energies[:, None] * imag_axis[None, :]))
+
+        candidates = []
+        for i in range(1, resolution - 1):
+            for j in range(resolution):
+                neighbours = ratio[i - 1:i + 2, max(j - 1, 0):j + 2]
+                if ratio[i, j] <= neighbours.min() and ratio[i, j] < 0.5:
+                    candidates.append(complex(real_axis[i], imag_axis[j]))
+
+        zeros = []
+        for beta in candidates:
+            for _ in range(100):
+                exponent = log_density - beta.real * energies
+                terms = np.exp(exponent - exponent.max() - 1j * beta.imag * energies)
+                z = terms.sum()
+                derivative = -(energies * terms).sum()
+                if derivative == 0:
+                    break
+                step = z / derivative
+                beta -= step
+                if abs(step) < 1e-12 * max(1.0, abs(beta)):
+                    break
+            exponent = log_density - beta.real * energies
+            terms = np.exp(exponent - exponent.max() - 1j * beta.imag * energies)
+            if beta.imag > 0 and abs(terms.sum()) < 1e-8 * np.abs(terms).sum():
+                if all(abs(beta - known) > 1e-8 * max(1.0, abs(beta)) for known in zeros):
+                    zeros.append(beta)
+        zeros.sort(key=lambda b: b.imag)
+        return np.array(zeros[:n_zeros], dtype=np.complex128)
+
+    def lee_yang_zeros(self, temperature: float, n_zeros: int = 1, resolution: int = 512) -> np.ndarray:
+        """Zeros of the reweighted ``Z(h)`` in the complex magnetic-field plane at ``temperature``.
+
+        By the Lee-Yang theorem they lie on the imaginary axis ``h = i H``,
+        where, using the spin-flip symmetry, ``Z(i H) / Z(0) = <cos(beta H M)>``.
+        Sign changes on a ``resolution`` grid over one half period
+        ``0 < H <= pi / (beta * gcd(M))`` are refined by bisection. Returns up
+        to ``n_zeros`` zeros ``i H``, nearest to the real axis first.
+        """
+        beta = 1.0 / temperature
+        log_weights = self._log_weights(np.array([beta]))[0]
+        probabilities = np.exp(log_weights - logsumexp(log_weights))
+        magnetizations = np.abs(self.magnetizations)
+        nonzero = np.round(magnetizations[magnetizations > 0]).astype(np.int64)
+        if nonzero.shape[0] == 0:
+            return np.zeros(0, dtype=np.complex128)
+        half_period = np.pi / (beta * np.gcd.reduce(nonzero))
+
+        def partition(field: float) -> float:
+            return float(probabilities @ np.cos(beta * field * magnetizations))
+
+        grid = np.linspace(0.0, half_period, resolution + 1)[1:]
+        values = np.cos(beta * grid[:, None] * magnetizations[None, :]) @ probabilities
+        zeros = []
+        for k in np.flatnonzero(np.sign(values[:-1]) != np.sign(values[1:])):
+            zeros.append(brentq(partition, grid[k], grid[k + 1], xtol=1e-14))
+            if len(zeros) == n_zeros:
+                break
+        return 1j * np.array(zeros, dtype=np.complex128)
@@ -0,0 +1,33 @@
+"""Seeding of the random generators used by the simulator."""
+
+from typing import Any, Dict, Optional
+import numpy as np
+from numba import _helperlib, jit
+
+@jit(nopython=True)
+def _seed_numba(seed: int) -> None:
+    """Seed the random generator used inside compiled kernels."""
+    np.random.seed(seed)
+
+def seed_all(seed: Optional[int]) -> None:
+    """Seed both the NumPy and the compiled-kernel random generators (no-op for None)."""
+    if seed is not None:
+        np.random.seed(seed)
+        _seed_numba(seed)
+
+def get_state() -> Dict[str, Any]:
+    """Snapshot of the NumPy and compiled-kernel random generator states.
+
+    Compiled kernels keep one generator per thread; only the state of the
+    calling thread is captured, which covers every kernel run with a single
+    thread.
+    """
+    return {
+        'numpy': np.random.get_state(),
+        'numba': _helperlib.rnd_get_state(_helperlib.rnd_get_np_state_ptr()),
+    }
+
+def set_state(state: Dict[str, Any]) -> None:
+    """Restore a snapshot taken with :func:`get_state`."""
+    np.random.set_state(state['numpy'])
+    _helperlib.rnd_set_state(_helperlib.rnd_get_np_state_ptr(), state['numba'])
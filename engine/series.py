@@ -0,0 +1,190 @@
+"""NumPy-backed time series storage for simulation metrics."""
+
+import copy
+from typing import Iterable, Iterator, Optional, Union
+import numpy as np
+
+class Series:
+    """Growable time series stored in a preallocated NumPy buffer.
+
+    Samples are kept unboxed in a contiguous array that grows geometrically.
+    Memory can be bounded with ``max_length`` in one of two modes:
+
+    - ``'ring'`` keeps only the most recent ``max_length`` samples. Every
+      sample is written twice, ``max_length`` apart, so the live window is
+      always a contiguous slice and :attr:`values` never copies.
+    - ``'decimate'`` keeps the whole run at decreasing resolution: when the
+      buffer is full every other stored sample is dropped and the stride
+      between stored samples doubles.
+
+    ``stride`` keeps only every ``stride``-th appended sample from the start.
+    """
+
+    MODES = ('grow', 'ring', 'decimate')
+
+    def __init__(
+        self,
+        dtype: Union[type, np.dtype] = np.float64,
+        max_length: Optional[int] = None,
+        mode: str = 'grow',
+        stride: int = 1,
+        capacity: int = 64
+    ):
+        """Initialize an empty series."""
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported series mode: {mode}")
+        if mode != 'grow' and not max_length:
+            raise ValueError(f"Series mode '{mode}' requires max_length")
+        if mode == 'decimate' and max_length < 2:
+            raise ValueError("Decimated series require max_length >= 2")
+        self.dtype = np.dtype(dtype)
+        self.max_length = max_length if mode != 'grow' else None
+        self.mode = mode
+        self.stride = stride
+        self._initial_stride = stride
+
+        if mode == 'ring':
+            self._buffer = np.empty(2 * max_length, dtype=self.dtype)
+        else:
+            size = capacity if self.max_length is None else min(capacity, self.max_length)
+            self._buffer = np.empty(max(1, size), dtype=self.dtype)
+        self._start = 0
+        self._length = 0
+        self._appended = 0
+
+    @property
+    def values(self) -> np.ndarray:
+        """Read-only view of the stored samples (no copy)."""
+        view = self._buffer[self._start:self._start + self._length]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def index(self) -> np.ndarray:
+        """Sample number (0-based append count) of every stored value."""
+        if self.mode == 'ring':
+            first = (self._appended - 1) // self.stride - self._length + 1
+            return (first + np.arange(self._length)) * self.stride
+        return np.arange(self._length) * self.stride
+
+    @property
+    def total(self) -> int:
+        """Number of samples appended, including dropped ones."""
+        return self._appended
+
+    def append(self, value: Union[float, complex]) -> None:
+        """Append one sample."""
+        position = self._appended
+        self._appended += 1
+        if position % self.stride:
+            return
+
+        if self.mode == 'ring':
+            capacity = self.max_length
+            slot = (self._start + self._length) % capacity
+            self._buffer[slot] = value
+            self._buffer[slot + capacity] = value
+            if self._length < capacity:
+                self._length += 1
+            else:
+                self._start = (self._start + 1) % capacity
+            return
+
+        if self._length == self._buffer.shape[0]:
+            if self.max_length is not None and self._length >= self.max_length:
+                self._decimate()
+                if position % self.stride:
+                    return
+            else:
+                self._grow(self._length + 1)
+        self._buffer[self._length] = value
+        self._length += 1
+
+    def extend(self, values: Iterable) -> None:
+        """Append many samples."""
+        values = np.asarray(values, dtype=self.dtype).reshape(-1)
+        if self.mode == 'grow' and self.stride == 1:
+            self._grow(self._length + values.shape[0])
+            self._buffer[self._length:self._length + values.shape[0]] = values
+            self._length += values.shape[0]
+            self._appended += values.shape[0]
+            return
+        for value in values:
+            self.append(value)
+
+    def load(self, values: Iterable) -> None:
+        """Replace the contents with ``values``, keeping the series configuration."""
+        self.clear()
+        self.extend(values)
+
+    def clear(self) -> None:
+        """Remove all samples."""
+        # A fresh buffer, since snapshots may still share the old one
+        self._buffer = np.empty_like(self._buffer)
+        self._start = 0
+        self._length = 0
+        self._appended = 0
+        self.stride = self._initial_stride
+
+    def snapshot(self) -> 'Series':
+        """Copy of the series as it is now, without copying a growing history.
+
+        In ``'grow'`` mode stored samples are never overwritten (a full
+        buffer is replaced, not reused), so the copy shares the buffer and
+        stays valid while the series keeps growing. Bounded series overwrite
+        their buffer and are copied, at most ``2 * max_length`` samples.
+        """
+        snapshot = copy.copy(self)
+        if self.mode != 'grow':
+            snapshot._buffer = self._buffer.copy()
+        return snapshot
+
+    def tolist(self) -> list:
+        """Stored samples as a Python list."""
+        return self.values.tolist()
+
+    def _grow(self, needed: int) -> None:
+        """Enlarge the buffer geometrically to hold at least ``needed`` samples."""
+        capacity = self._buffer.shape[0]
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        if self.max_length is not None:
+            capacity = min(capacity, self.max_length)
+        buffer = np.empty(capacity, dtype=self.dtype)
+        buffer[:self._length] = self._buffer[:self._length]
+        self._buffer = buffer
+
+    def _decimate(self) -> None:
+        """Drop every other stored sample and double the stride."""
+        kept = self._buffer[:self._length:2]
+        self._length = kept.shape[0]
+        self._buffer[:self._length] = kept
+        self.stride *= 2
+
+    def __getstate__(self) -> dict:
+        """Pickle only the stored samples of a growing series, not its spare capacity."""
+        state = self.__dict__.copy()
+        if self.mode == 'grow':
+            state['_buffer'] = self._buffer[:self._length]
+        return state
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator:
+        return iter(self.values)
+
+    def __getitem__(self, item):
+        return self.values[item]
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        values = self.values
+        if dtype is not None and np.dtype(dtype) != self.dtype:
+            return values.astype(dtype)
+        if copy:
+            return values.copy()
+        return values
+
+    def __repr__(self) -> str:
+        return f"Series(length={self._length}, mode='{self.mode}', dtype={self.dtype})"
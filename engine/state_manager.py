@@ -5,8 +5,13 @@ import pickle
 import json
 import numpy as np
 import pandas as pd
+from dataclasses import asdict
 from typing import Any, Dict
-from .enums import BoundaryCondition, UpdateRule
+from .enums import BoundaryCondition, UpdateRule, LatticeStorage
+from .correlation import CorrelationAccumulator
+from .series import Series
+from .thermodynamics import Blocking, RunningMoments
+from .rawio import read_raw, write_raw
 
 class StateManager:
     """Manages saving and loading simulation states."""
@@ -23,6 +28,8 @@ class StateManager:
             self._save_npz(simulator, filename)
         elif format == 'csv':
             self._save_csv(simulator, filename)
+        elif format == 'raw':
+            self._save_raw(simulator, filename)
         else:
             raise ValueError(f"Unsupported format: {format}")
             
@@ -38,36 +45,43 @@ class StateManager:
             self._load_npz(simulator, filename)
         elif format == 'csv':
             self._load_csv(simulator, filename)
+        elif format == 'raw':
+            self._load_raw(simulator, filename)
         else:
             raise ValueError(f"Unsupported format: {format}")
             
     def _save_h5(self, simulator: Any, filename: str) -> None:
         """Save state in HDF5 format with compression."""
         with h5py.File(filename, 'w') as f:
-            # Save grid with compression
-            f.create_dataset('grid', data=simulator.grid, compression='gzip', compression_opts=9)
+            # Save the lattice in its storage form with compression
+            if simulator.storage == LatticeStorage.MULTISPIN:
+                f.create_dataset('packed', data=simulator.packed, compression='gzip', compression_opts=9)
+            else:
+                f.create_dataset('grid', data=simulator.grid, compression='gzip', compression_opts=9)
             f.create_dataset('temperature', data=simulator.temperature)
             f.create_dataset('energy', data=simulator.energy)
             f.create_dataset('magnetization', data=simulator.magnetization)
             
             # Save metrics with compression
             metrics_group = f.create_group('metrics')
-            for key, value in simulator.metrics.__dict__.items():
-                if isinstance(value, (list, np.ndarray)):
+            for key, value in self._metrics_state(simulator.metrics).items():
+                if isinstance(value, np.ndarray):
                     metrics_group.create_dataset(key, data=value, compression='gzip', compression_opts=9)
                 else:
-                    metrics_group.attrs[key] = value
+                    metrics_group.attrs[key] = json.dumps(value)
                     
             # Save simulation parameters
             params_group = f.create_group('parameters')
             params_group.attrs['grid_size'] = simulator.grid_size
             params_group.attrs['boundary'] = simulator.boundary.value
             params_group.attrs['update_rule'] = simulator.update_rule.value
+            params_group.attrs['storage'] = simulator.storage.value
             
     def _save_pickle(self, simulator: Any, filename: str) -> None:
         """Save state in pickle format."""
         state = {
-            'grid': simulator.grid,
+            'storage': simulator.storage,
+            'lattice': self._lattice_data(simulator),
             'temperature': simulator.temperature,
             'energy': simulator.energy,
             'magnetization': simulator.magnetization,
@@ -81,13 +95,14 @@ class StateManager:
     def _save_json(self, simulator: Any, filename: str) -> None:
         """Save state in JSON format."""
         state = {
-            'grid': simulator.grid.tolist(),
+            'storage': simulator.storage.value,
+            'lattice': self._lattice_data(simulator).tolist(),
             'temperature': simulator.temperature,
-            'energy': simulator.energy,
-            'magnetization': simulator.magnetization,
+            'energy': float(simulator.energy),
+            'magnetization': int(simulator.magnetization),
             'metrics': {
-                k: v if not isinstance(v, (list, np.ndarray)) else v.tolist()
-                for k, v in simulator.metrics.__dict__.items()
+                k: self._json_array(v) if isinstance(v, np.ndarray) else v
+                for k, v in self._metrics_state(simulator.metrics).items()
             },
             'boundary': simulator.boundary.value,
             'update_rule': simulator.update_rule.value
@@ -99,45 +114,71 @@ class StateManager:
         """Save state in compressed NumPy format."""
         np.savez_compressed(
             filename,
-            grid=simulator.grid,
+            storage=simulator.storage.value,
+            lattice=self._lattice_data(simulator),
             temperature=simulator.temperature,
             energy=simulator.energy,
             magnetization=simulator.magnetization,
-            metrics=simulator.metrics.__dict__
+            metrics=self._metrics_state(simulator.metrics)
         )
         
     def _save_csv(self, simulator: Any, filename: str) -> None:
         """Save state in CSV format."""
         # Save grid
-        np.savetxt(f"{filename}_grid.csv", simulator.grid, delimiter=',')
+        np.savetxt(f"{filename}_grid.csv", simulator.grid, delimiter=',', fmt='%d')
         
         # Save metrics
-        metrics_df = pd.DataFrame(simulator.metrics.__dict__)
+        metrics_df = pd.DataFrame({
+            key: pd.Series(series.values)
+            for key, series in simulator.metrics.series().items()
+        })
         metrics_df.to_csv(f"{filename}_metrics.csv", index=False)
         
         # Save parameters
         params_df = pd.DataFrame({
-            'parameter': ['grid_size', 'temperature', 'boundary', 'update_rule'],
+            'parameter': ['grid_size', 'temperature', 'boundary', 'update_rule', 'storage'],
             'value': [simulator.grid_size, simulator.temperature, 
-                     simulator.boundary.value, simulator.update_rule.value]
+                     simulator.boundary.value, simulator.update_rule.value,
+                     simulator.storage.value]
         })
         params_df.to_csv(f"{filename}_parameters.csv", index=False)
         
+    def _save_raw(self, simulator: Any, filename: str) -> None:
+        """Save state in the memory-mappable raw format."""
+        arrays = {'lattice': self._lattice_data(simulator)}
+        metrics = {}
+        for key, value in self._metrics_state(simulator.metrics).items():
+            if isinstance(value, np.ndarray):
+                arrays[f"metrics/{key}"] = value
+            else:
+                metrics[key] = value
+        write_raw(filename, arrays, {
+            'storage': simulator.storage.value,
+            'grid_size': simulator.grid_size,
+            'temperature': simulator.temperature,
+            'energy': float(simulator.energy),
+            'magnetization': int(simulator.magnetization),
+            'boundary': simulator.boundary.value,
+            'update_rule': simulator.update_rule.value,
+            'metrics': metrics
+        })
+        
     def _load_h5(self, simulator: Any, filename: str) -> None:
         """Load state from HDF5 file."""
         with h5py.File(filename, 'r') as f:
-            simulator.grid = f['grid'][:]
+            if 'packed' in f:
+                self._restore_lattice(simulator, LatticeStorage.MULTISPIN, f['packed'][:])
+            else:
+                self._restore_lattice(simulator, LatticeStorage.INT8, f['grid'][:])
             simulator.temperature = f['temperature'][()]
             simulator.energy = f['energy'][()]
             simulator.magnetization = f['magnetization'][()]
             
             # Load metrics
             metrics_group = f['metrics']
-            for key in metrics_group.keys():
-                if isinstance(metrics_group[key], h5py.Dataset):
-                    setattr(simulator.metrics, key, metrics_group[key][:])
-                else:
-                    setattr(simulator.metrics, key, metrics_group[key].attrs[key])
+            state = {key: json.loads(value) for key, value in metrics_group.attrs.items()}
+            state.update({key: metrics_group[key][:] for key in metrics_group.keys()})
+            self._restore_metrics(simulator.metrics, state)
                     
             # Load parameters
             params_group = f['parameters']
@@ -150,7 +191,10 @@ class StateManager:
         with open(filename, 'rb') as f:
             state = pickle.load(f)
             
-        simulator.grid = state['grid']
+        if 'lattice' in state:
+            self._restore_lattice(simulator, state['storage'], state['lattice'])
+        else:
+            self._restore_lattice(simulator, LatticeStorage.INT8, state['grid'])
         simulator.temperature = state['temperature']
         simulator.energy = state['energy']
         simulator.magnetization = state['magnetization']
@@ -163,46 +207,136 @@ class StateManager:
         with open(filename, 'r') as f:
             state = json.load(f)
             
-        simulator.grid = np.array(state['grid'])
+        if 'lattice' in state:
+            storage = LatticeStorage(state['storage'])
+            dtype = np.uint64 if storage == LatticeStorage.MULTISPIN else np.int8
+            self._restore_lattice(simulator, storage, np.array(state['lattice'], dtype=dtype))
+        else:
+            self._restore_lattice(simulator, LatticeStorage.INT8, np.array(state['grid']))
         simulator.temperature = state['temperature']
         simulator.energy = state['energy']
         simulator.magnetization = state['magnetization']
         
         # Load metrics
-        for key, value in state['metrics'].items():
-            if isinstance(value, list):
-                setattr(simulator.metrics, key, np.array(value))
-            else:
-                setattr(simulator.metrics, key, value)
+        self._restore_metrics(simulator.metrics, {
+            key: self._from_json_array(value)
+            for key, value in state['metrics'].items()
+        })
                 
         simulator.boundary = BoundaryCondition(state['boundary'])
         simulator.update_rule = UpdateRule(state['update_rule'])
         
     def _load_npz(self, simulator: Any, filename: str) -> None:
         """Load state from compressed NumPy file."""
-        data = np.load(filename)
-        simulator.grid = data['grid']
+        data = np.load(filename, allow_pickle=True)
+        if 'lattice' in data:
+            self._restore_lattice(simulator, LatticeStorage(str(data['storage'])), data['lattice'])
+        else:
+            self._restore_lattice(simulator, LatticeStorage.INT8, data['grid'])
         simulator.temperature = data['temperature']
         simulator.energy = data['energy']
         simulator.magnetization = data['magnetization']
         
         # Load metrics
-        for key, value in data['metrics'].item().items():
-            setattr(simulator.metrics, key, value)
+        self._restore_metrics(simulator.metrics, data['metrics'].item())
             
     def _load_csv(self, simulator: Any, filename: str) -> None:
         """Load state from CSV files."""
         # Load grid
-        simulator.grid = np.loadtxt(f"{filename}_grid.csv", delimiter=',')
+        grid = np.loadtxt(f"{filename}_grid.csv", delimiter=',', dtype=np.int8)
         
         # Load metrics
         metrics_df = pd.read_csv(f"{filename}_metrics.csv")
+        series = simulator.metrics.series()
         for column in metrics_df.columns:
-            setattr(simulator.metrics, column, metrics_df[column].values)
+            values = metrics_df[column].dropna()
+            if column in series and series[column].dtype.kind == 'c':
+                values = values.map(complex)
+            self._restore_metrics(simulator.metrics, {column: values.to_numpy()})
             
         # Load parameters
         params_df = pd.read_csv(f"{filename}_parameters.csv")
         simulator.grid_size = int(params_df[params_df['parameter'] == 'grid_size']['value'].iloc[0])
         simulator.temperature = float(params_df[params_df['parameter'] == 'temperature']['value'].iloc[0])
         simulator.boundary = BoundaryCondition(params_df[params_df['parameter'] == 'boundary']['value'].iloc[0])
-        simulator.update_rule = UpdateRule(params_df[params_df['parameter'] == 'update_rule']['value'].iloc[0]) 
\ No newline at end of file
+        simulator.update_rule = UpdateRule(params_df[params_df['parameter'] == 'update_rule']['value'].iloc[0])
+        storage = params_df[params_df['parameter'] == 'storage']['value']
+        simulator.storage = LatticeStorage(storage.iloc[0]) if len(storage) else LatticeStorage.INT8
+        simulator.grid = grid
+        
+    def _load_raw(self, simulator: Any, filename: str) -> None:
+        """Load state from a raw file; the lattice is mapped copy-on-write, not read."""
+        arrays, attrs = read_raw(filename, mode='c')
+        self._restore_lattice(simulator, LatticeStorage(attrs['storage']), arrays['lattice'])
+        simulator.grid_size = attrs['grid_size']
+        simulator.temperature = attrs['temperature']
+        simulator.energy = attrs['energy']
+        simulator.magnetization = attrs['magnetization']
+        simulator.boundary = BoundaryCondition(attrs['boundary'])
+        simulator.update_rule = UpdateRule(attrs['update_rule'])
+        
+        state = dict(attrs['metrics'])
+        state.update({
+            name.split('/', 1)[1]: values
+            for name, values in arrays.items() if name.startswith('metrics/')
+        })
+        self._restore_metrics(simulator.metrics, state)
+        
+    def _lattice_data(self, simulator: Any) -> np.ndarray:
+        """Return the lattice in its storage form (dense int8 grid or packed words)."""
+        if simulator.storage == LatticeStorage.MULTISPIN:
+            return simulator.packed
+        return simulator.grid
+        
+    def _restore_lattice(self, simulator: Any, storage: LatticeStorage, data: np.ndarray) -> None:
+        """Install a saved lattice, switching the simulator to the saved storage form."""
+        simulator.storage = storage
+        if storage == LatticeStorage.MULTISPIN:
+            simulator.packed = np.ascontiguousarray(data, dtype=np.uint64)
+            simulator._grid = None
+            simulator._spins_changed()
+        else:
+            simulator.grid = data
+            simulator.packed = None
+        
+    def _metrics_state(self, metrics: Any) -> Dict[str, Any]:
+        """Flatten metrics into series views, plain dicts and scalars.
+        
+        Series are returned as views of their buffers, so writers serialize
+        them without an intermediate copy.
+        """
+        state = {}
+        for key, value in metrics.__dict__.items():
+            if isinstance(value, Series):
+                state[key] = value.values
+            elif isinstance(value, (RunningMoments, Blocking)):
+                state[key] = asdict(value)
+            elif isinstance(value, CorrelationAccumulator):
+                # Accumulated spectra are rebuilt from later snapshots
+                continue
+            else:
+                state[key] = value
+        return state
+        
+    def _restore_metrics(self, metrics: Any, state: Dict[str, Any]) -> None:
+        """Load a flattened metrics state back into a metrics object."""
+        for key, value in state.items():
+            current = getattr(metrics, key, None)
+            if isinstance(current, Series):
+                current.load(value)
+            elif isinstance(current, (RunningMoments, Blocking)):
+                setattr(metrics, key, type(current)(**value))
+            else:
+                setattr(metrics, key, value)
+                
+    def _json_array(self, values: np.ndarray) -> Any:
+        """JSON form of an array; complex arrays are split into real and imaginary parts."""
+        if np.iscomplexobj(values):
+            return {'real': values.real.tolist(), 'imag': values.imag.tolist()}
+        return values.tolist()
+        
+    def _from_json_array(self, value: Any) -> Any:
+        """Inverse of :meth:`_json_array` (other values pass through)."""
+        if isinstance(value, dict) and set(value) == {'real', 'imag'}:
+            return np.array(value['real']) + 1j * np.array(value['imag'])
+        return value
\ No newline at end of file
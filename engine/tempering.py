@@ -0,0 +1,270 @@
+"""Replica-exchange (parallel tempering) driver."""
+
+import multiprocessing
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from .core import ThermoSimulator
+from .rng import seed_all
+from .thermodynamics import RunningMoments
+
+class _ReplicaGroup:
+    """Replicas advanced one after another in the same process."""
+
+    def __init__(self, settings: List[Dict[str, Any]], seed: Optional[int] = None):
+        """Create one simulator per settings dict."""
+        seed_all(seed)
+        self.simulators = [ThermoSimulator(**kwargs) for kwargs in settings]
+
+    def sweep(self, temperatures: Sequence[float], n_sweeps: int) -> List[Tuple[float, int]]:
+        """Sweep every replica at its temperature; return the (E, M) of each."""
+        for simulator, temperature in zip(self.simulators, temperatures):
+            simulator.temperature = temperature
+            simulator.sweep(n_sweeps)
+        return [(float(sim.energy), int(sim.magnetization)) for sim in self.simulators]
+
+    def grids(self) -> List[np.ndarray]:
+        """Copies of the replica configurations."""
+        return [np.array(sim.grid) for sim in self.simulators]
+
+def _replica_worker(connection, settings: List[Dict[str, Any]], seed: Optional[int]) -> None:
+    """Worker process loop: own a replica group and serve commands until closed."""
+    try:
+        group = _ReplicaGroup(settings, seed)
+        connection.send(None)
+    except Exception as error:
+        connection.send(error)
+        return
+    while True:
+        command, args = connection.recv()
+        if command == 'close':
+            break
+        try:
+            result = getattr(group, command)(*args)
+        except Exception as error:
+            result = error
+        connection.send(result)
+    connection.close()
+
+class ParallelTempering:
+    """Replica exchange over a temperature ladder.
+
+    Every replica keeps its own lattice for the whole run; an accepted
+    exchange swaps the temperatures of two replicas, so no configuration is
+    ever copied. With ``num_processes > 1`` the replicas are spread over that
+    many worker processes that sweep concurrently and only report energies
+    back; otherwise they are swept in this process, where each replica can
+    still use Numba threads (e.g. with ``SweepOrder.CHECKERBOARD``).
+
+    Neighbouring temperatures alternately attempt exchanges on even and odd
+    pairs. Per-pair acceptance and replica round-trip times (lowest to highest
+    temperature and back, in exchange rounds) are recorded, and
+    :meth:`adapt_ladder` respaces the ladder to equalize the acceptance.
+    """
+
+    def __init__(
+        self,
+        temperatures: Sequence[float],
+        grid_size: int = 50,
+        num_processes: int = 1,
+        seed: Optional[int] = None,
+        **simulator_kwargs
+    ):
+        """Start one replica per temperature; extra keywords go to ``ThermoSimulator``."""
+        temperatures = np.sort(np.asarray(temperatures, dtype=np.float64))
+        if temperatures.shape[0] < 2:
+            raise ValueError("Parallel tempering needs at least two temperatures")
+        if temperatures[0] <= 0:
+            raise ValueError("Parallel tempering requires positive temperatures")
+        self.temperatures = temperatures
+        self.grid_size = grid_size
+        n_replicas = temperatures.shape[0]
+
+        # slot[r] is the ladder index of replica r, replica_at[k] the replica at index k
+        self.slot = np.arange(n_replicas)
+        self.replica_at = np.arange(n_replicas)
+        self.energies = np.zeros(n_replicas)
+        self.magnetizations = np.zeros(n_replicas, dtype=np.int64)
+        self.n_rounds = 0
+
+        n_workers = max(1, min(num_processes, n_replicas))
+        self._owned = [list(range(w, n_replicas, n_workers)) for w in range(n_workers)]
+        threads = max(1, num_processes // n_workers)
+        settings = [
+            dict(simulator_kwargs, grid_size=grid_size, temperature=temperatures[r], num_processes=threads)
+            for r in range(n_replicas)
+        ]
+
+        self._group = None
+        self._workers = []
+        if n_workers == 1:
+            self._group = _ReplicaGroup(settings, seed)
+        else:
+            seeds = [None] * n_workers
+            if seed is not None:
+                seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_workers)]
+            context = multiprocessing.get_context('spawn')
+            for owned, worker_seed in zip(self._owned, seeds):
+                parent, child = context.Pipe()
+                process = context.Process(
+                    target=_replica_worker,
+                    args=(child, [settings[r] for r in owned], worker_seed),
+                    daemon=True
+                )
+                process.start()
+                child.close()
+                self._workers.append((process, parent))
+            for _, connection in self._workers:
+                error = connection.recv()
+                if error is not None:
+                    self.close()
+                    raise error
+            seed_all(seed)
+
+        self.reset_statistics()
+
+    @property
+    def n_replicas(self) -> int:
+        """Number of replicas (and temperatures)."""
+        return self.temperatures.shape[0]
+
+    @property
+    def replica_temperatures(self) -> np.ndarray:
+        """Current temperature of every replica."""
+        return self.temperatures[self.slot]
+
+    @property
+    def acceptance_rates(self) -> np.ndarray:
+        """Exchange acceptance of every neighbouring temperature pair."""
+        return self.accepted_swaps / np.maximum(self.attempted_swaps, 1)
+
+    @property
+    def round_trip_times(self) -> np.ndarray:
+        """Completed round trips, in exchange rounds."""
+        return np.asarray(self._round_trips, dtype=np.int64)
+
+    def reset_statistics(self) -> None:
+        """Clear the exchange, round-trip and per-temperature statistics."""
+        n_pairs = self.n_replicas - 1
+        self.attempted_swaps = np.zeros(n_pairs, dtype=np.int64)
+        self.accepted_swaps = np.zeros(n_pairs, dtype=np.int64)
+        self.moments = [RunningMoments() for _ in range(self.n_replicas)]
+        self._round_trips = []
+        # +1 while a replica travels up from the lowest temperature, -1 on the way back
+        self._direction = np.zeros(self.n_replicas, dtype=np.int8)
+        self._trip_start = np.zeros(self.n_replicas, dtype=np.int64)
+
+    def _call(self, command: str, per_replica: Optional[Sequence] = None, *args) -> list:
+        """Run a replica-group command everywhere and gather the results in replica order."""
+        if self._group is not None:
+            call_args = ([per_replica[r] for r in self._owned[0]],) if per_replica is not None else ()
+            return getattr(self._group, command)(*(call_args + args))
+
+        for owned, (_, connection) in zip(self._owned, self._workers):
+            call_args = ([per_replica[r] for r in owned],) if per_replica is not None else ()
+            connection.send((command, call_args + args))
+        results = [None] * self.n_replicas
+        for owned, (_, connection) in zip(self._owned, self._workers):
+            result = connection.recv()
+            if isinstance(result, Exception):
+                raise result
+            for r, value in zip(owned, result):
+                results[r] = value
+        return results
+
+    def sweep(self, n_sweeps: int = 1) -> None:
+        """Advance every replica by ``n_sweeps`` sweeps at its current temperature."""
+        states = self._call('sweep', self.replica_temperatures, n_sweeps)
+        for r, (energy, magnetization) in enumerate(states):
+            self.energies[r] = energy
+            self.magnetizations[r] = magnetization
+
+    def exchange(self) -> None:
+        """Attempt temperature swaps between neighbouring ladder slots (even or odd pairs)."""
+        betas = 1.0 / self.temperatures
+        for k in range(self.n_rounds % 2, self.n_replicas - 1, 2):
+            a = self.replica_at[k]
+            b = self.replica_at[k + 1]
+            log_ratio = (betas[k] - betas[k + 1]) * (self.energies[a] - self.energies[b])
+            self.attempted_swaps[k] += 1
+            if log_ratio >= 0 or np.random.random() < np.exp(log_ratio):
+                self.accepted_swaps[k] += 1
+                self.replica_at[k], self.replica_at[k + 1] = b, a
+                self.slot[a], self.slot[b] = k + 1, k
+        self.n_rounds += 1
+
+        top = self.n_replicas - 1
+        for r in range(self.n_replicas):
+            if self.slot[r] == 0:
+                if self._direction[r] == -1:
+                    self._round_trips.append(self.n_rounds - self._trip_start[r])
+                if self._direction[r] != 1:
+                    self._trip_start[r] = self.n_rounds
+                self._direction[r] = 1
+            elif self.slot[r] == top and self._direction[r] == 1:
+                self._direction[r] = -1
+
+    def measure(self) -> None:
+        """Add the current energy and magnetization at every temperature to ``moments``."""
+        for k in range(self.n_replicas):
+            r = self.replica_at[k]
+            self.moments[k].push(self.energies[r], self.magnetizations[r])
+
+    def run(
+        self,
+        n_rounds: int = 1000,
+        sweeps_per_exchange: int = 1,
+        adapt_interval: Optional[int] = None
+    ) -> None:
+        """Alternate sweeps, measurements and exchange attempts for ``n_rounds`` rounds.
+
+        With ``adapt_interval`` the ladder is respaced after every that many
+        rounds; this is meant for equilibration, as it resets the statistics.
+        """
+        for round_index in range(n_rounds):
+            self.sweep(sweeps_per_exchange)
+            self.measure()
+            self.exchange()
+            if adapt_interval and (round_index + 1) % adapt_interval == 0:
+                self.adapt_ladder()
+
+    def adapt_ladder(self, min_rate: float = 1e-3) -> np.ndarray:
+        """Respace the inner temperatures so every pair has the same swap acceptance.
+
+        The swap rejection of a pair grows with the square of its inverse
+        temperature gap, so ``sqrt(-log(acceptance))`` is taken as the length
+        of every interval and the inverse temperatures are moved to equally
+        spaced positions along that length. The end points stay fixed and the
+        statistics are reset. Returns the new ladder.
+        """
+        if not self.attempted_swaps.all():
+            return self.temperatures
+        rates = np.clip(self.acceptance_rates, min_rate, 1.0 - min_rate)
+        length = np.concatenate(([0.0], np.cumsum(np.sqrt(-np.log(rates)))))
+        targets = np.linspace(0.0, length[-1], self.n_replicas)
+        betas = np.interp(targets, length, 1.0 / self.temperatures)
+        self.temperatures = 1.0 / betas
+        self.reset_statistics()
+        return self.temperatures
+
+    def configurations(self) -> List[np.ndarray]:
+        """Copies of the lattices, ordered by temperature."""
+        grids = self._call('grids')
+        return [grids[r] for r in self.replica_at]
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        for process, connection in self._workers:
+            try:
+                connection.send(('close', ()))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join()
+            connection.close()
+        self._workers = []
+
+    def __enter__(self) -> 'ParallelTempering':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
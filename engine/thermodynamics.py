@@ -1,52 +1,237 @@
 """Thermodynamic quantities computation."""
 
-from dataclasses import dataclass, field
-from typing import List, Dict, Any, TYPE_CHECKING
+from dataclasses import dataclass, field, fields
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 import numpy as np
 from scipy.stats import entropy
 
+from .correlation import CorrelationAccumulator
+from .series import Series
+
 if TYPE_CHECKING:
     from .core import ThermoSimulator
 
+# Fewer samples give complex zeros dominated by noise
+_MIN_ZERO_SAMPLES = 100
+# Blocking levels with fewer blocks have too noisy a variance to be used
+_MIN_BLOCKS = 32
+# Blocks shorter than this many autocorrelation times underestimate the error
+_BLOCK_FACTOR = 20
+
+@dataclass
+class Blocking:
+    """Streaming blocking analysis (Flyvbjerg-Petersen) of one observable.
+    
+    Level ``k`` keeps Welford moments of the means of consecutive blocks of
+    ``2 ** k`` samples, so memory is O(log n) and a sample costs O(1)
+    amortized. The variance of the mean estimated at level ``k`` grows with
+    ``k`` until the blocks are much longer than the autocorrelation time;
+    the estimates use the first level whose blocks are ``_BLOCK_FACTOR``
+    times longer than its own ``tau_int`` (or the last level with enough
+    blocks, in which case :attr:`converged` is false).
+    """
+    counts: List[int] = field(default_factory=list)
+    means: List[float] = field(default_factory=list)
+    m2: List[float] = field(default_factory=list)
+    pending: List[Optional[float]] = field(default_factory=list)
+    
+    def push(self, value: float) -> None:
+        """Add one sample, cascading completed block pairs to the next level."""
+        level = 0
+        while True:
+            if level == len(self.counts):
+                self.counts.append(0)
+                self.means.append(0.0)
+                self.m2.append(0.0)
+                self.pending.append(None)
+            self.counts[level] += 1
+            delta = value - self.means[level]
+            self.means[level] += delta / self.counts[level]
+            self.m2[level] += delta * (value - self.means[level])
+            if self.pending[level] is None:
+                self.pending[level] = value
+                return
+            value = 0.5 * (self.pending[level] + value)
+            self.pending[level] = None
+            level += 1
+            
+    def reset(self) -> None:
+        """Discard all samples."""
+        self.__init__()
+        
+    @property
+    def count(self) -> int:
+        """Number of samples."""
+        return self.counts[0] if self.counts else 0
+        
+    def _variance_of_mean(self, level: int) -> float:
+        """Variance of the mean estimated from the blocks of one level."""
+        n = self.counts[level]
+        return self.m2[level] / (n * (n - 1)) if n > 1 else 0.0
+        
+    def _level(self) -> Optional[int]:
+        """Level used for the estimates (None with too few samples)."""
+        usable = [k for k, n in enumerate(self.counts) if n >= _MIN_BLOCKS]
+        for k in usable:
+            if 2 ** k >= _BLOCK_FACTOR * self._tau(k):
+                return k
+        return usable[-1] if usable else None
+        
+    @property
+    def converged(self) -> bool:
+        """Whether some level has enough blocks that are long enough for reliable estimates."""
+        level = self._level()
+        return level is not None and 2 ** level >= _BLOCK_FACTOR * self._tau(level)
+        
+    def _tau(self, level: int) -> float:
+        """``tau_int`` implied by the variance of the mean at one level."""
+        variance = self._variance_of_mean(0)
+        return 0.5 * self._variance_of_mean(level) / variance if variance > 0 else 0.5
+        
+    def tau(self) -> float:
+        """Integrated autocorrelation time in samples (0.5 without correlations, NaN with too few samples)."""
+        level = self._level()
+        return self._tau(level) if level is not None else float('nan')
+        
+    def error(self) -> float:
+        """Standard error of the mean, corrected for autocorrelations (NaN with too few samples)."""
+        level = self._level()
+        return float(np.sqrt(self._variance_of_mean(level))) if level is not None else float('nan')
+
+@dataclass
+class RunningMoments:
+    """Streaming moments of energy and magnetization, updated in O(1) per sample.
+    
+    Variances use Welford's update; the remaining moments are running means,
+    so no sample history is needed to evaluate the derived quantities.
+    """
+    count: int = 0
+    mean_energy: float = 0.0
+    m2_energy: float = 0.0
+    mean_magnetization: float = 0.0
+    m2_magnetization: float = 0.0
+    mean_abs_magnetization: float = 0.0
+    mean_magnetization2: float = 0.0
+    mean_magnetization4: float = 0.0
+    
+    def push(self, energy: float, magnetization: float) -> None:
+        """Add one (E, M) sample."""
+        self.count += 1
+        n = self.count
+        
+        delta = energy - self.mean_energy
+        self.mean_energy += delta / n
+        self.m2_energy += delta * (energy - self.mean_energy)
+        
+        delta = magnetization - self.mean_magnetization
+        self.mean_magnetization += delta / n
+        self.m2_magnetization += delta * (magnetization - self.mean_magnetization)
+        
+        magnetization2 = magnetization * magnetization
+        self.mean_abs_magnetization += (abs(magnetization) - self.mean_abs_magnetization) / n
+        self.mean_magnetization2 += (magnetization2 - self.mean_magnetization2) / n
+        self.mean_magnetization4 += (magnetization2 * magnetization2 - self.mean_magnetization4) / n
+        
+    def reset(self) -> None:
+        """Discard all samples."""
+        self.__init__()
+        
+    @property
+    def energy_variance(self) -> float:
+        """Population variance of the energy samples."""
+        return self.m2_energy / self.count if self.count else 0.0
+        
+    @property
+    def magnetization_variance(self) -> float:
+        """Population variance of the magnetization samples."""
+        return self.m2_magnetization / self.count if self.count else 0.0
+        
+    def specific_heat(self, temperature: float) -> float:
+        """Specific heat Var(E) / T^2."""
+        return self.energy_variance / (temperature ** 2)
+        
+    def susceptibility(self, temperature: float) -> float:
+        """Magnetic susceptibility Var(M) / T."""
+        return self.magnetization_variance / temperature
+        
+    def binder_cumulant(self) -> float:
+        """Binder cumulant 1 - <M^4> / (3 <M^2>^2)."""
+        if self.mean_magnetization2 == 0:
+            return 0.0
+        return 1 - self.mean_magnetization4 / (3 * self.mean_magnetization2 ** 2)
+
 @dataclass
 class SimulationMetrics:
     """Container for simulation metrics and thermodynamic quantities."""
-    energy_history: List[float] = field(default_factory=list)
-    magnetization_history: List[float] = field(default_factory=list)
-    temperature_history: List[float] = field(default_factory=list)
+    energy_history: Series = field(default_factory=Series)
+    magnetization_history: Series = field(default_factory=Series)
+    temperature_history: Series = field(default_factory=Series)
     acceptance_rate: float = 0.0
     step_count: int = 0
-    cluster_sizes: List[int] = field(default_factory=list)
-    specific_heat: List[float] = field(default_factory=list)
-    susceptibility: List[float] = field(default_factory=list)
-    binder_cumulant: List[float] = field(default_factory=list)
-    correlation_length: List[float] = field(default_factory=list)
-    entropy: List[float] = field(default_factory=list)
-    free_energy: List[float] = field(default_factory=list)
-    heat_capacity: List[float] = field(default_factory=list)
-    order_parameter: List[float] = field(default_factory=list)
+    cluster_sizes: Series = field(default_factory=lambda: Series(np.int64))
+    specific_heat: Series = field(default_factory=Series)
+    susceptibility: Series = field(default_factory=Series)
+    binder_cumulant: Series = field(default_factory=Series)
+    correlation_length: Series = field(default_factory=Series)
+    entropy: Series = field(default_factory=Series)
+    free_energy: Series = field(default_factory=Series)
+    heat_capacity: Series = field(default_factory=Series)
+    order_parameter: Series = field(default_factory=Series)
     critical_exponents: Dict[str, float] = field(default_factory=dict)
     phase_diagram: Dict[str, List[float]] = field(default_factory=dict)
-    fisher_zeros: List[complex] = field(default_factory=list)
-    lee_yang_zeros: List[complex] = field(default_factory=list)
-    renyi_entropy: List[float] = field(default_factory=list)
-    topological_charge: List[float] = field(default_factory=list)
-    vortex_density: List[float] = field(default_factory=list)
-    domain_wall_energy: List[float] = field(default_factory=list)
-    spin_glass_order: List[float] = field(default_factory=list)
-    chiral_order: List[float] = field(default_factory=list)
-    nematic_order: List[float] = field(default_factory=list)
-    bond_order: List[float] = field(default_factory=list)
-    current_correlation: List[float] = field(default_factory=list)
-    structure_factor: List[float] = field(default_factory=list)
-    dynamic_susceptibility: List[float] = field(default_factory=list)
-    critical_slowing_down: List[float] = field(default_factory=list)
+    fisher_zeros: Series = field(default_factory=lambda: Series(np.complex128))
+    lee_yang_zeros: Series = field(default_factory=lambda: Series(np.complex128))
+    renyi_entropy: Series = field(default_factory=Series)
+    topological_charge: Series = field(default_factory=Series)
+    vortex_density: Series = field(default_factory=Series)
+    domain_wall_energy: Series = field(default_factory=Series)
+    spin_glass_order: Series = field(default_factory=Series)
+    chiral_order: Series = field(default_factory=Series)
+    nematic_order: Series = field(default_factory=Series)
+    bond_order: Series = field(default_factory=Series)
+    current_correlation: Series = field(default_factory=Series)
+    structure_factor: Series = field(default_factory=Series)
+    dynamic_susceptibility: Series = field(default_factory=Series)
+    critical_slowing_down: Series = field(default_factory=Series)
+    moments: RunningMoments = field(default_factory=RunningMoments)
+    energy_blocking: Blocking = field(default_factory=Blocking)
+    magnetization_blocking: Blocking = field(default_factory=Blocking)
+    record_history: bool = True
+    history_length: Optional[int] = None
+    history_mode: str = 'grow'
+    correlation_interval: int = 10
+    correlations: Optional[CorrelationAccumulator] = field(default=None, repr=False)
+    _zeros_recorded: int = field(default=0, repr=False)
     
+    def __post_init__(self) -> None:
+        """Apply the history bounds to every series."""
+        if self.history_length is None and self.history_mode == 'grow':
+            return
+        for name, series in self.series().items():
+            setattr(self, name, Series(
+                series.dtype, max_length=self.history_length, mode=self.history_mode
+            ))
+            
+    def series(self) -> Dict[str, Series]:
+        """All time-series fields by name."""
+        return {
+            f.name: getattr(self, f.name) for f in fields(self)
+            if isinstance(getattr(self, f.name), Series)
+        }
+        
     def update(self, simulator: 'ThermoSimulator') -> None:
-        """Update all metrics based on current simulation state."""
-        self.energy_history.append(simulator.energy)
-        self.magnetization_history.append(simulator.magnetization)
-        self.temperature_history.append(simulator.temperature)
+        """Update all metrics based on current simulation state.
+        
+        Moments are always accumulated; the time series (raw and derived) are
+        only appended when ``record_history`` is set.
+        """
+        self.moments.push(float(simulator.energy), float(simulator.magnetization))
+        self.energy_blocking.push(float(simulator.energy))
+        self.magnetization_blocking.push(abs(float(simulator.magnetization)))
+        if self.record_history:
+            self.energy_history.append(simulator.energy)
+            self.magnetization_history.append(simulator.magnetization)
+            self.temperature_history.append(simulator.temperature)
         self.acceptance_rate = simulator.accepted_moves / max(1, simulator.total_moves)
         self.step_count += 1
         
@@ -62,40 +247,65 @@ class SimulationMetrics:
         self._update_complex_zeros(simulator)
         self._update_structure_factor(simulator)
         self._update_dynamic_susceptibility(simulator)
+        self._update_autocorrelation()
+        
+    def autocorrelation_time(self) -> float:
+        """Larger integrated autocorrelation time of E and ``|M|``, in measurements (NaN only if both are unknown)."""
+        return float(np.fmax(self.energy_blocking.tau(), self.magnetization_blocking.tau()))
+        
+    def reset_statistics(self) -> None:
+        """Restart the running moments, autocorrelation estimates and correlations, e.g. after thermalization."""
+        self.moments.reset()
+        self.energy_blocking.reset()
+        self.magnetization_blocking.reset()
+        if self.correlations is not None:
+            self.correlations.reset()
         
     def _update_specific_heat(self, simulator: 'ThermoSimulator') -> None:
         """Update specific heat calculation."""
-        if len(self.energy_history) > 1:
-            energy_var = np.var(self.energy_history)
-            self.specific_heat.append(energy_var / (simulator.temperature ** 2))
+        if self.record_history and self.moments.count > 1:
+            self.specific_heat.append(self.moments.specific_heat(simulator.temperature))
             
     def _update_susceptibility(self, simulator: 'ThermoSimulator') -> None:
         """Update magnetic susceptibility calculation."""
-        if len(self.magnetization_history) > 1:
-            mag_var = np.var(self.magnetization_history)
-            self.susceptibility.append(mag_var / simulator.temperature)
+        if self.record_history and self.moments.count > 1:
+            self.susceptibility.append(self.moments.susceptibility(simulator.temperature))
             
     def _update_binder_cumulant(self) -> None:
         """Update Binder cumulant calculation."""
-        if len(self.magnetization_history) > 10:
-            m2 = np.mean(np.array(self.magnetization_history) ** 2)
-            m4 = np.mean(np.array(self.magnetization_history) ** 4)
-            self.binder_cumulant.append(1 - m4 / (3 * m2 ** 2))
+        if self.record_history and self.moments.count > 10:
+            self.binder_cumulant.append(self.moments.binder_cumulant())
             
+    def _correlation_step(self) -> bool:
+        """Whether this update measures correlations (every ``correlation_interval`` updates, 0 disables)."""
+        return self.correlation_interval > 0 and self.step_count % self.correlation_interval == 0
+        
     def _update_correlation_length(self, simulator: 'ThermoSimulator') -> None:
-        """Update correlation length calculation."""
-        # Implementation of correlation length calculation
-        pass
+        """Add a snapshot to ``correlations`` and update the second-moment correlation length.
+        
+        Runs every ``correlation_interval`` updates only, as it costs an FFT
+        of the lattice.
+        """
+        if not self._correlation_step():
+            return
+        grid = simulator.grid
+        if self.correlations is None or self.correlations.shape != grid.shape:
+            self.correlations = CorrelationAccumulator(grid.shape)
+        self.correlations.add(grid)
+        if self.record_history:
+            self.correlation_length.append(self.correlations.correlation_length())
         
     def _update_entropy(self, simulator: 'ThermoSimulator') -> None:
-        """Update entropy calculation."""
-        # Implementation of entropy calculation
-        pass
+        """Update the entropy at the current temperature from the simulator's density of states."""
+        dos = getattr(simulator, 'density_of_states', None)
+        if self.record_history and dos is not None and simulator.temperature > 0:
+            self.entropy.append(dos.thermodynamics([simulator.temperature])['entropy'][0])
         
     def _update_free_energy(self, simulator: 'ThermoSimulator') -> None:
-        """Update free energy calculation."""
-        # Implementation of free energy calculation
-        pass
+        """Update the free energy at the current temperature from the simulator's density of states."""
+        dos = getattr(simulator, 'density_of_states', None)
+        if self.record_history and dos is not None and simulator.temperature > 0:
+            self.free_energy.append(dos.thermodynamics([simulator.temperature])['free_energy'][0])
         
     def _update_heat_capacity(self, simulator: 'ThermoSimulator') -> None:
         """Update heat capacity calculation."""
@@ -108,15 +318,38 @@ class SimulationMetrics:
         pass
         
     def _update_complex_zeros(self, simulator: 'ThermoSimulator') -> None:
-        """Update Fisher and Lee-Yang zeros."""
-        # Implementation of complex zeros calculation
-        pass
+        """Update the leading Fisher and Lee-Yang zeros, reweighting the samples recorded at the current temperature.
+        
+        Zeros are recomputed whenever the number of recorded samples has
+        doubled, which keeps the total cost linear in the run length.
+        """
+        recorded = self.temperature_history.total
+        if not self.record_history or simulator.temperature <= 0 or recorded < 2 * self._zeros_recorded:
+            return
+        self._zeros_recorded = recorded
+        from .reweighting import Histogram, Reweighting
+        histogram = Histogram.from_metrics(self, simulator.temperature)
+        if histogram.n_samples < _MIN_ZERO_SAMPLES or histogram.energies.shape[0] < 2:
+            return
+        reweighting = Reweighting([histogram])
+        for series, zeros in (
+            (self.fisher_zeros, reweighting.fisher_zeros()),
+            (self.lee_yang_zeros, reweighting.lee_yang_zeros(simulator.temperature))
+        ):
+            if zeros.shape[0]:
+                series.append(zeros[0])
         
     def _update_structure_factor(self, simulator: 'ThermoSimulator') -> None:
-        """Update structure factor calculation."""
-        # Implementation of structure factor calculation
-        pass
+        """Update ``S(k_min)`` from ``correlations``; the full ``S(k)`` is ``correlations.structure_factor()``."""
+        if self.record_history and self._correlation_step() and self.correlations is not None:
+            self.structure_factor.append(self.correlations.minimum_wavevector_peak())
         
+    def _update_autocorrelation(self) -> None:
+        """Record the current autocorrelation time in ``critical_slowing_down``."""
+        tau = self.autocorrelation_time()
+        if self.record_history and np.isfinite(tau):
+            self.critical_slowing_down.append(tau)
+            
     def _update_dynamic_susceptibility(self, simulator: 'ThermoSimulator') -> None:
         """Update dynamic susceptibility calculation."""
         # Implementation of dynamic susceptibility calculation
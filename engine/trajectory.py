@@ -0,0 +1,181 @@
+"""Append-only HDF5 trajectories of a running simulation."""
+
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+import h5py
+import numpy as np
+
+from .observers import Observer
+
+_SCALARS = {
+    'sweep': np.int64,
+    'temperature': np.float64,
+    'energy': np.float64,
+    'magnetization': np.int64,
+}
+
+_COMPRESSORS = ('lzf', 'gzip', None)
+
+def pack_grid(grid: np.ndarray) -> np.ndarray:
+    """Bit-pack a +-1 grid of any shape in flat order (a set bit is spin +1)."""
+    return np.packbits(grid.reshape(-1) > 0)
+
+def unpack_grid(packed: np.ndarray, shape: Tuple[int, ...]) -> np.ndarray:
+    """Inverse of :func:`pack_grid`: a dense int8 +-1 grid of ``shape``."""
+    bits = np.unpackbits(packed, count=int(np.prod(shape)))
+    return (bits.astype(np.int8) * 2 - 1).reshape(shape)
+
+class TrajectoryWriter(Observer):
+    """Appends measurements and bit-packed lattice snapshots to one HDF5 file.
+
+    Every :meth:`append` adds one frame to the resizable, chunked ``sweep``,
+    ``temperature``, ``energy`` and ``magnetization`` datasets, and every
+    ``snapshot_interval``-th frame also adds the lattice to ``grids``
+    (``snapshot_frame`` holds the frame of each snapshot). Only the new frame
+    is written, with a fast compressor (``'lzf'`` or ``'gzip'`` at
+    ``compression_opts``, default level 1). With ``swmr`` the file is in
+    single-writer/multiple-reader mode and flushed after every frame, so
+    other processes can read it with ``h5py.File(filename, 'r', swmr=True)``
+    while the simulation runs. An existing trajectory of the same lattice
+    shape is continued.
+
+    ``grid_size`` is the side of a square lattice, or the ``shape`` of any
+    other (e.g. ``simulator.shape``).
+
+    As an observer it appends a frame at every measurement of ``run()``.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        grid_size: Union[int, Sequence[int]],
+        snapshot_interval: int = 1,
+        compression: Optional[str] = 'lzf',
+        compression_opts: Optional[int] = None,
+        chunk_frames: int = 256,
+        swmr: bool = True
+    ):
+        """Open (or create) the trajectory file."""
+        if compression not in _COMPRESSORS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if compression == 'gzip' and compression_opts is None:
+            compression_opts = 1
+        shape = (grid_size, grid_size) if np.isscalar(grid_size) else tuple(int(n) for n in grid_size)
+        self.filename = filename
+        self.shape = shape
+        self.snapshot_interval = snapshot_interval
+        self.swmr = swmr
+        self._file = h5py.File(filename, 'a', libver='latest')
+
+        options = dict(compression=compression, compression_opts=compression_opts)
+        frame_bytes = (int(np.prod(shape)) + 7) // 8
+        f = self._file
+        if 'grids' in f:
+            stored = _stored_shape(f)
+            if stored != shape or f['grids'].ndim != 2:
+                raise ValueError(f"{filename} holds a trajectory of shape {stored}")
+        else:
+            f.attrs['shape'] = shape
+            f.attrs['encoding'] = 'packbits'
+            f.create_dataset(
+                'grids', shape=(0, frame_bytes), maxshape=(None, frame_bytes),
+                dtype=np.uint8, chunks=(1, frame_bytes), **options
+            )
+            f.create_dataset(
+                'snapshot_frame', shape=(0,), maxshape=(None,), dtype=np.int64,
+                chunks=(chunk_frames,), **options
+            )
+            for name, dtype in _SCALARS.items():
+                f.create_dataset(
+                    name, shape=(0,), maxshape=(None,), dtype=dtype,
+                    chunks=(chunk_frames,), **options
+                )
+        if swmr:
+            f.swmr_mode = True
+
+    @property
+    def n_frames(self) -> int:
+        """Number of frames in the file."""
+        return self._file['energy'].shape[0]
+
+    @property
+    def n_snapshots(self) -> int:
+        """Number of lattice snapshots in the file."""
+        return self._file['grids'].shape[0]
+
+    def append(self, simulator: Any, snapshot: Optional[bool] = None) -> None:
+        """Append the current state as one frame.
+
+        The lattice is stored when ``snapshot`` is true, or when it is None and
+        the frame number is a multiple of ``snapshot_interval``.
+        """
+        if tuple(simulator.shape) != self.shape:
+            raise ValueError(f"Simulator shape {simulator.shape} does not match the trajectory shape {self.shape}")
+        f = self._file
+        frame = self.n_frames
+        values = {
+            'sweep': simulator.sweep_count,
+            'temperature': simulator.temperature,
+            'energy': simulator.energy,
+            'magnetization': simulator.magnetization,
+        }
+        for name, value in values.items():
+            dataset = f[name]
+            dataset.resize((frame + 1,))
+            dataset[frame] = value
+
+        if snapshot is None:
+            snapshot = bool(self.snapshot_interval) and frame % self.snapshot_interval == 0
+        if snapshot:
+            index = self.n_snapshots
+            f['grids'].resize(index + 1, axis=0)
+            f['grids'][index] = pack_grid(simulator.grid)
+            f['snapshot_frame'].resize((index + 1,))
+            f['snapshot_frame'][index] = frame
+
+        if self.swmr:
+            for name in ('grids', 'snapshot_frame', *_SCALARS):
+                f[name].flush()
+
+    def flush(self) -> None:
+        """Flush buffered data to disk."""
+        self._file.flush()
+
+    def close(self) -> None:
+        """Close the file."""
+        if self._file.id.valid:
+            self._file.close()
+
+    def on_measurement(self, simulator: Any) -> None:
+        """Append a frame."""
+        self.append(simulator)
+
+    def on_finish(self, simulator: Any) -> None:
+        """Flush the file; it stays open for further runs."""
+        self.flush()
+
+    def __enter__(self) -> 'TrajectoryWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+def _stored_shape(f: h5py.File) -> Tuple[int, ...]:
+    """Lattice shape of an open trajectory (files of square grids may only record ``grid_size``)."""
+    if 'shape' in f.attrs:
+        return tuple(int(n) for n in f.attrs['shape'])
+    grid_size = int(f.attrs['grid_size'])
+    return (grid_size, grid_size)
+
+def read_snapshot(filename: str, index: int) -> np.ndarray:
+    """Dense grid of one snapshot of a trajectory (readable while it is being written)."""
+    with h5py.File(filename, 'r', libver='latest', swmr=True) as f:
+        packed = f['grids'][index]
+        shape = _stored_shape(f)
+        if packed.ndim == 2:
+            return np.unpackbits(packed, axis=-1, count=shape[-1]).astype(np.int8) * 2 - 1
+        return unpack_grid(packed, shape)
+
+def read_frames(filename: str) -> Dict[str, np.ndarray]:
+    """Per-frame scalar datasets of a trajectory."""
+    with h5py.File(filename, 'r', libver='latest', swmr=True) as f:
+        return {name: f[name][()] for name in (*_SCALARS, 'snapshot_frame')}
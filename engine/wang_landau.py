@@ -0,0 +1,487 @@
+"""Wang-Landau density-of-states estimation, with replica exchange across energy windows."""
+
+import multiprocessing
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from numba import jit
+from scipy.special import logsumexp
+
+from .lattice import Lattice, lattice_energy_numba
+from .rng import seed_all
+
+def energy_levels(lattice: Lattice) -> Tuple[int, int, int]:
+    """Energy grid ``(e_min, step, n_levels)`` containing every energy of an integer lattice.
+
+    Every bond contributes ``-|J|`` or ``+|J|``, so energies lie between
+    ``-sum |J|`` and ``+sum |J|`` in steps of twice the couplings' gcd.
+    """
+    if lattice.weighted:
+        raise ValueError("Wang-Landau sampling needs integer couplings without fields")
+    strengths = np.abs(lattice.couplings[lattice.couplings != 0]).astype(np.int64)
+    if strengths.shape[0] == 0:
+        return 0, 1, 1
+    total = int(strengths.sum()) // 2
+    step = 2 * int(np.gcd.reduce(strengths))
+    return -total, step, 2 * total // step + 1
+
+class DensityOfStates:
+    """Density of states ``g(E)`` of the visited energy levels, stored as ``log g``.
+
+    ``log_g`` is normalized so that the states add up to ``2 ** n_sites``
+    (``n_sites`` counts the updatable spins). All canonical quantities at
+    any temperature follow from it without further sampling.
+    """
+
+    def __init__(self, energies: np.ndarray, log_g: np.ndarray, n_sites: int):
+        """Store and normalize the estimate."""
+        self.energies = np.asarray(energies, dtype=np.float64)
+        log_g = np.asarray(log_g, dtype=np.float64)
+        self.n_sites = n_sites
+        self.log_g = log_g - logsumexp(log_g) + n_sites * np.log(2.0)
+
+    def log_partition_function(self, temperatures: Sequence[float]) -> np.ndarray:
+        """``log Z(T)`` at every temperature."""
+        betas = 1.0 / np.atleast_1d(np.asarray(temperatures, dtype=np.float64))
+        return logsumexp(self.log_g[None, :] - betas[:, None] * self.energies[None, :], axis=1)
+
+    def canonical_distribution(self, temperature: float) -> np.ndarray:
+        """Probability of every energy level at one temperature."""
+        log_weights = self.log_g - self.energies / temperature
+        return np.exp(log_weights - logsumexp(log_weights))
+
+    def thermodynamics(self, temperatures: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Canonical ``energy``, ``specific_heat``, ``free_energy`` and ``entropy`` (whole system).
+
+        Uses ``F = -T log Z`` and ``S = (U - F) / T``; the results are arrays
+        aligned with ``temperature``.
+        """
+        temperatures = np.atleast_1d(np.asarray(temperatures, dtype=np.float64))
+        log_weights = self.log_g[None, :] - self.energies[None, :] / temperatures[:, None]
+        log_z = logsumexp(log_weights, axis=1)
+        probabilities = np.exp(log_weights - log_z[:, None])
+        energy = probabilities @ self.energies
+        energy2 = probabilities @ self.energies ** 2
+        free_energy = -temperatures * log_z
+        return {
+            'temperature': temperatures,
+            'energy': energy,
+            'specific_heat': (energy2 - energy ** 2) / temperatures ** 2,
+            'free_energy': free_energy,
+            'entropy': (energy - free_energy) / temperatures,
+        }
+
+@jit(nopython=True)
+def wang_landau_numba(
+    spins: np.ndarray,
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    couplings: np.ndarray,
+    sites: np.ndarray,
+    energy: int,
+    e_min: int,
+    step: int,
+    low: int,
+    high: int,
+    log_g: np.ndarray,
+    histogram: np.ndarray,
+    ln_f: float,
+    n_trials: int
+) -> Tuple[int, int]:
+    """Wang-Landau single-spin random walk restricted to the levels ``low .. high``.
+
+    A flip from level ``k`` to ``k'`` is accepted with probability
+    ``min(1, g(k) / g(k'))``, then ``log g`` and the histogram of the
+    current level grow. A walker that starts outside the window first
+    drifts into it, accepting every flip that does not move it further
+    away, without touching the histogram. Returns ``(energy, accepted)``.
+    """
+    level = (energy - e_min) // step
+    accepted = 0
+    for _ in range(n_trials):
+        site = sites[np.random.randint(0, sites.shape[0])]
+        spin = spins[site]
+        field = 0
+        for p in range(indptr[site], indptr[site + 1]):
+            field += couplings[p] * spins[indices[p]]
+        new_level = level + 2 * spin * field // step
+
+        if level < low or level > high:
+            distance = low - level if level < low else level - high
+            new_distance = max(low - new_level, new_level - high, 0)
+            if new_distance <= distance:
+                spins[site] = -spin
+                level = new_level
+                accepted += 1
+            continue
+
+        if low <= new_level <= high:
+            difference = log_g[level] - log_g[new_level]
+            if difference >= 0.0 or np.random.random() < np.exp(difference):
+                spins[site] = -spin
+                level = new_level
+                accepted += 1
+        log_g[level] += ln_f
+        histogram[level] += 1
+    return e_min + level * step, accepted
+
+class WangLandauWalker:
+    """A Wang-Landau random walk of one configuration within an energy window.
+
+    ``window`` is a ``(low, high)`` pair of level indices of
+    :func:`energy_levels` (the whole range by default). After every
+    :meth:`run` the histogram is checked: once it is flat, i.e. every visited
+    level has at least ``flatness`` times the mean count, the modification
+    factor ``ln_f`` is halved and the histogram cleared. The walk has
+    converged when ``ln_f`` drops below ``ln_f_final``.
+
+    Halving alone freezes the estimate at a finite error; with
+    ``one_over_t`` (Belardinelli and Pereyra) ``ln_f`` instead follows
+    ``n_levels / t`` once halving has brought it below that, where ``t``
+    counts the trial flips and ``n_levels`` the visited levels, which
+    makes the error keep decreasing.
+    """
+
+    def __init__(
+        self,
+        lattice: Lattice,
+        spins: np.ndarray,
+        window: Optional[Tuple[int, int]] = None,
+        flatness: float = 0.8,
+        ln_f: float = 1.0,
+        ln_f_final: float = 1e-6,
+        one_over_t: bool = True
+    ):
+        """Start a walk from ``spins`` (a flat int8 array the walker updates in place)."""
+        self.lattice = lattice
+        self.e_min, self.step, n_levels = energy_levels(lattice)
+        self.window = window if window is not None else (0, n_levels - 1)
+        self.flatness = flatness
+        self.ln_f = ln_f
+        self.ln_f_final = ln_f_final
+        self.one_over_t = one_over_t
+        self._following_time = False
+        self.log_g = np.zeros(n_levels)
+        self.histogram = np.zeros(n_levels, dtype=np.int64)
+        self.iterations = 0
+        self.accepted = 0
+        self.trials = 0
+        self.set_state(spins)
+
+    def set_state(self, spins: np.ndarray, energy: Optional[int] = None) -> None:
+        """Continue the walk from another configuration (its energy is computed if not given)."""
+        self.spins = spins
+        if energy is None:
+            lattice = self.lattice
+            energy = int(round(lattice_energy_numba(spins, lattice.indptr, lattice.indices, lattice.couplings)))
+        self.energy = energy
+
+    @property
+    def level(self) -> int:
+        """Level index of the current energy."""
+        return (self.energy - self.e_min) // self.step
+
+    @property
+    def converged(self) -> bool:
+        """Whether ``ln_f`` has dropped below ``ln_f_final``."""
+        return self.ln_f < self.ln_f_final
+
+    def run(self, n_sweeps: int) -> None:
+        """Walk ``n_sweeps`` sweeps, then refine ``ln_f`` if the histogram is flat."""
+        lattice = self.lattice
+        sites = lattice.active_sites()
+        if sites.shape[0] == 0:
+            return
+        n_trials = n_sweeps * sites.shape[0]
+        self.energy, accepted = wang_landau_numba(
+            self.spins, lattice.indptr, lattice.indices, lattice.couplings, sites,
+            self.energy, self.e_min, self.step, self.window[0], self.window[1],
+            self.log_g, self.histogram, self.ln_f, n_trials
+        )
+        self.accepted += accepted
+        self.trials += n_trials
+        low, high = self.window
+        inverse_time = np.count_nonzero(self.log_g[low:high + 1]) / self.trials
+        if self.one_over_t and (self._following_time or self.ln_f <= inverse_time):
+            self._following_time = True
+            self.ln_f = float(inverse_time)
+        elif self.is_flat():
+            self.ln_f /= 2.0
+            self.histogram[:] = 0
+            self.iterations += 1
+
+    def is_flat(self) -> bool:
+        """Whether every visited level of the window has at least ``flatness`` times the mean count."""
+        low, high = self.window
+        visited = self.log_g[low:high + 1] > 0
+        counts = self.histogram[low:high + 1][visited]
+        return counts.shape[0] > 0 and counts.min() >= self.flatness * counts.mean()
+
+    def density_of_states(self) -> DensityOfStates:
+        """Current estimate over the visited levels."""
+        visited = np.flatnonzero(self.log_g > 0)
+        return DensityOfStates(
+            self.e_min + visited * self.step, self.log_g[visited], self.lattice.active_sites().shape[0]
+        )
+
+def window_bounds(n_levels: int, n_windows: int, overlap: float) -> List[Tuple[int, int]]:
+    """Split ``n_levels`` levels into ``n_windows`` equal windows sharing ``overlap`` of their width."""
+    width = n_levels / (n_windows - (n_windows - 1) * overlap)
+    stride = width * (1.0 - overlap)
+    bounds = []
+    for w in range(n_windows):
+        low = int(round(w * stride))
+        high = n_levels - 1 if w == n_windows - 1 else int(round(w * stride + width)) - 1
+        bounds.append((low, high))
+    return bounds
+
+class _WindowGroup:
+    """Walkers of several windows advanced one after another in the same process."""
+
+    def __init__(
+        self,
+        settings: Dict[str, Any],
+        windows: List[Tuple[int, int]],
+        options: Dict[str, float],
+        seed: Optional[int] = None
+    ):
+        """Create one walker per window, each starting from the nearer of an ordered or a random state."""
+        from .core import ThermoSimulator
+        seed_all(seed)
+        self.walkers = []
+        for low, high in windows:
+            simulator = ThermoSimulator(**settings)
+            lattice = simulator._structure()
+            spins = simulator.grid.reshape(-1).copy()
+            walker = WangLandauWalker(lattice, spins, (low, high), **options)
+            ordered = np.where(lattice.frozen, spins, 1).astype(np.int8)
+            ordered_level = (int(round(lattice_energy_numba(
+                ordered, lattice.indptr, lattice.indices, lattice.couplings))) - walker.e_min) // walker.step
+            if abs(ordered_level - (low + high) / 2) < abs(walker.level - (low + high) / 2):
+                walker.set_state(ordered)
+            self.walkers.append(walker)
+
+    def run(self, n_sweeps: int) -> List[Tuple[int, np.ndarray, bool]]:
+        """Advance every unconverged walker; return the level, ``log g`` and convergence of each."""
+        for walker in self.walkers:
+            if not walker.converged:
+                walker.run(n_sweeps)
+        return [(walker.level, walker.log_g, walker.converged) for walker in self.walkers]
+
+    def state(self, index: int) -> Tuple[np.ndarray, int]:
+        """Configuration and energy of one walker."""
+        walker = self.walkers[index]
+        return walker.spins.copy(), walker.energy
+
+    def set_state(self, index: int, spins: np.ndarray, energy: int) -> None:
+        """Replace the configuration of one walker."""
+        self.walkers[index].set_state(spins, energy)
+
+    def statistics(self) -> List[Tuple[float, int]]:
+        """``(ln_f, iterations)`` of every walker."""
+        return [(walker.ln_f, walker.iterations) for walker in self.walkers]
+
+def _window_worker(connection, settings, windows, options, seed) -> None:
+    """Worker process loop: own a window group and serve commands until closed."""
+    try:
+        group = _WindowGroup(settings, windows, options, seed)
+        connection.send(None)
+    except Exception as error:
+        connection.send(error)
+        return
+    while True:
+        command, args = connection.recv()
+        if command == 'close':
+            break
+        try:
+            result = getattr(group, command)(*args)
+        except Exception as error:
+            result = error
+        connection.send(result)
+    connection.close()
+
+class WangLandau:
+    """Replica-exchange Wang-Landau (REWL) estimate of the density of states.
+
+    The energy range is split into ``n_windows`` windows that overlap by the
+    fraction ``overlap``; each runs its own :class:`WangLandauWalker` (in a
+    pool of ``num_processes`` worker processes when that is above one).
+    After every ``sweeps_per_check`` sweeps, walkers of neighbouring windows
+    whose energies both lie in the shared range swap configurations with
+    probability ``min(1, g_i(E_x) g_j(E_y) / (g_i(E_y) g_j(E_x)))``. Once every
+    window has converged the pieces are stitched where the slopes of their
+    ``log g`` agree best, giving one :class:`DensityOfStates`.
+
+    Extra keywords go to ``ThermoSimulator`` and select the lattice.
+    """
+
+    def __init__(
+        self,
+        n_windows: int = 1,
+        overlap: float = 0.75,
+        num_processes: int = 1,
+        flatness: float = 0.8,
+        ln_f_final: float = 1e-6,
+        seed: Optional[int] = None,
+        **simulator_kwargs
+    ):
+        """Create the windows and start the workers."""
+        from .core import ThermoSimulator
+        settings = dict(simulator_kwargs, num_processes=1)
+        lattice = ThermoSimulator(**settings)._structure()
+        self.e_min, self.step, n_levels = energy_levels(lattice)
+        self.n_sites = lattice.active_sites().shape[0]
+        self.windows = window_bounds(n_levels, n_windows, overlap)
+        self.levels = np.zeros(n_windows, dtype=np.int64)
+        self.log_g = [np.zeros(n_levels) for _ in range(n_windows)]
+        self.converged = np.zeros(n_windows, dtype=np.bool_)
+        self.attempted_swaps = np.zeros(max(0, n_windows - 1), dtype=np.int64)
+        self.accepted_swaps = np.zeros(max(0, n_windows - 1), dtype=np.int64)
+        self.n_rounds = 0
+
+        options = dict(flatness=flatness, ln_f_final=ln_f_final)
+        n_workers = max(1, min(num_processes, n_windows))
+        self._owned = [list(range(w, n_windows, n_workers)) for w in range(n_workers)]
+        self._group = None
+        self._workers = []
+        if n_workers == 1:
+            self._group = _WindowGroup(settings, self.windows, options, seed)
+        else:
+            seeds = [None] * n_workers
+            if seed is not None:
+                seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_workers)]
+            context = multiprocessing.get_context('spawn')
+            for owned, worker_seed in zip(self._owned, seeds):
+                parent, child = context.Pipe()
+                process = context.Process(
+                    target=_window_worker,
+                    args=(child, settings, [self.windows[w] for w in owned], options, worker_seed),
+                    daemon=True
+                )
+                process.start()
+                child.close()
+                self._workers.append((process, parent))
+            for _, connection in self._workers:
+                error = connection.recv()
+                if error is not None:
+                    self.close()
+                    raise error
+            seed_all(seed)
+
+    @property
+    def n_windows(self) -> int:
+        """Number of energy windows."""
+        return len(self.windows)
+
+    def _call(self, command: str, *args) -> list:
+        """Run a group command in every worker and gather the results in window order."""
+        if self._group is not None:
+            return getattr(self._group, command)(*args)
+        for _, connection in self._workers:
+            connection.send((command, args))
+        results = [None] * self.n_windows
+        for owned, (_, connection) in zip(self._owned, self._workers):
+            result = connection.recv()
+            if isinstance(result, Exception):
+                raise result
+            for w, value in zip(owned, result):
+                results[w] = value
+        return results
+
+    def _request(self, window: int, command: str, *args) -> Any:
+        """Run a group command for one window."""
+        worker = window % len(self._owned)
+        index = self._owned[worker].index(window)
+        if self._group is not None:
+            return getattr(self._group, command)(index, *args)
+        connection = self._workers[worker][1]
+        connection.send((command, (index,) + args))
+        result = connection.recv()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def sweep(self, n_sweeps: int) -> None:
+        """Advance every unconverged window by ``n_sweeps`` sweeps."""
+        for w, (level, log_g, converged) in enumerate(self._call('run', n_sweeps)):
+            self.levels[w] = level
+            self.log_g[w] = log_g
+            self.converged[w] = converged
+
+    def exchange(self) -> None:
+        """Attempt configuration swaps between neighbouring windows (even or odd pairs)."""
+        for w in range(self.n_rounds % 2, self.n_windows - 1, 2):
+            a, b = self.levels[w], self.levels[w + 1]
+            low, high = self.windows[w + 1][0], self.windows[w][1]
+            if not (low <= a <= high and low <= b <= high):
+                continue
+            self.attempted_swaps[w] += 1
+            lower, upper = self.log_g[w], self.log_g[w + 1]
+            log_ratio = lower[a] - lower[b] + upper[b] - upper[a]
+            if log_ratio >= 0 or np.random.random() < np.exp(log_ratio):
+                self.accepted_swaps[w] += 1
+                state_a = self._request(w, 'state')
+                state_b = self._request(w + 1, 'state')
+                self._request(w, 'set_state', *state_b)
+                self._request(w + 1, 'set_state', *state_a)
+                self.levels[w], self.levels[w + 1] = b, a
+        self.n_rounds += 1
+
+    def run(self, sweeps_per_check: int = 100, max_rounds: Optional[int] = None) -> DensityOfStates:
+        """Alternate sweeps and exchanges until every window converged (or ``max_rounds``)."""
+        rounds = 0
+        while not self.converged.all() and (max_rounds is None or rounds < max_rounds):
+            self.sweep(sweeps_per_check)
+            self.exchange()
+            rounds += 1
+        return self.density_of_states()
+
+    def statistics(self) -> List[Tuple[float, int]]:
+        """``(ln_f, iterations)`` of every window."""
+        return self._call('statistics')
+
+    def density_of_states(self) -> DensityOfStates:
+        """Stitch the windows into one density of states.
+
+        Neighbouring pieces are joined at the level of their common visited
+        range where the slopes (inverse microcanonical temperatures) of the
+        two ``log g`` estimates differ least; the upper piece is shifted to
+        match the lower one there.
+        """
+        levels = np.arange(self.log_g[0].shape[0])
+        visited = self.log_g[0] > 0
+        log_g = self.log_g[0].copy()
+        for w in range(1, self.n_windows):
+            upper = self.log_g[w]
+            upper_visited = upper > 0
+            common = np.flatnonzero(visited & upper_visited)
+            if common.shape[0] == 0:
+                raise ValueError(f"Windows {w - 1} and {w} share no visited level; increase the overlap")
+            if common.shape[0] > 2:
+                slope_lower = np.gradient(log_g[common], common)
+                slope_upper = np.gradient(upper[common], common)
+                join = common[1 + np.argmin(np.abs(slope_lower - slope_upper)[1:-1])]
+            else:
+                join = common[0]
+            shift = log_g[join] - upper[join]
+            above = (levels >= join) & upper_visited
+            log_g[above] = upper[above] + shift
+            visited = (visited & (levels < join)) | above
+        keep = np.flatnonzero(visited)
+        return DensityOfStates(self.e_min + keep * self.step, log_g[keep], self.n_sites)
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        for process, connection in self._workers:
+            try:
+                connection.send(('close', ()))
+            except (BrokenPipeError, OSError):
+                pass
+            process.join()
+            connection.close()
+        self._workers = []
+
+    def __enter__(self) -> 'WangLandau':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
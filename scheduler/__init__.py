@@ -5,9 +5,11 @@ from .annealing import (
     cauchy_annealing,
     adaptive_annealing
 )
+from .sweep import sweep_temperatures
 
 __all__ = [
     'boltzmann_annealing',
     'cauchy_annealing',
-    'adaptive_annealing'
+    'adaptive_annealing',
+    'sweep_temperatures'
 ] 
\ No newline at end of file
@@ -0,0 +1,205 @@
+"""Temperature sweeps with process-pool fan-out and on-disk result caching."""
+
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from engine.core import ThermoSimulator
+from engine.enums import UpdateRule
+from engine.lattice import Lattice
+from engine.rng import seed_all
+from engine.thermodynamics import RunningMoments
+
+OBSERVABLES = ('energy', 'magnetization', 'specific_heat', 'susceptibility', 'binder_cumulant')
+
+def _array_digest(*arrays: Optional[np.ndarray]) -> str:
+    """Hash of the shapes, dtypes and contents of some arrays (None included)."""
+    digest = hashlib.sha256()
+    for array in arrays:
+        if array is None:
+            digest.update(b'none;')
+            continue
+        array = np.ascontiguousarray(array)
+        digest.update(f"{array.dtype.str}{array.shape};".encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+def _key_value(value: Any) -> Any:
+    """JSON-serializable stand-in of a parameter that json cannot encode."""
+    if isinstance(value, Lattice):
+        return {'lattice': _array_digest(
+            np.array(value.shape), value.indptr, value.indices, value.couplings,
+            value.frozen, value.fields, np.array([value.offset])
+        )}
+    if isinstance(value, np.ndarray):
+        return {'array': _array_digest(value)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot cache sweep points with a parameter of type {type(value).__name__}")
+
+def _point_key(temperature: float, settings: Dict[str, Any]) -> str:
+    """Cache key of one sweep point: a hash of its temperature and run parameters.
+
+    Lattices and arrays enter through a hash of their contents; parameters
+    of other types that json cannot encode raise ``TypeError``.
+    """
+    params = {
+        name: value.value if isinstance(value, Enum) else value
+        for name, value in settings.items()
+    }
+    params['temperature'] = float(temperature)
+    text = json.dumps(params, sort_keys=True, default=_key_value)
+    return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+def _cache_path(cache_dir: str, key: str) -> str:
+    """File holding the cached result of one point."""
+    return os.path.join(cache_dir, f"{key}.npz")
+
+def _measure_point(
+    simulator: ThermoSimulator, n_equil: int, n_measure: int, measure_interval: int
+) -> Dict[str, float]:
+    """Equilibrate and measure one point; observables are per site."""
+    simulator.sweep(n_equil)
+    moments = RunningMoments()
+    for sample in simulator.iterate(measure_interval, n_measure):
+        moments.push(sample.energy, sample.magnetization)
+    n_sites = simulator.n_sites
+    temperature = simulator.temperature
+    return {
+        'energy': moments.mean_energy / n_sites,
+        'magnetization': moments.mean_abs_magnetization / n_sites,
+        'specific_heat': moments.specific_heat(temperature) / n_sites,
+        'susceptibility': moments.susceptibility(temperature) / n_sites,
+        'binder_cumulant': moments.binder_cumulant(),
+    }
+
+def _run_chain(
+    points: List[Tuple[float, str]],
+    settings: Dict[str, Any],
+    n_equil: int,
+    n_measure: int,
+    measure_interval: int,
+    warm_start: bool,
+    cache_dir: Optional[str],
+    seed: Optional[int]
+) -> List[Dict[str, float]]:
+    """Run the points of one chain in order, each starting from the previous configuration.
+
+    Cached points are not recomputed, but their stored configuration still
+    seeds the next point of the chain.
+    """
+    seed_all(seed)
+    simulator = None
+    results = []
+    for temperature, key in points:
+        path = _cache_path(cache_dir, key) if cache_dir else None
+        if path and os.path.exists(path):
+            with np.load(path) as data:
+                result = {name: float(data[name]) for name in OBSERVABLES}
+                grid = data['grid']
+            if warm_start:
+                if simulator is None:
+                    simulator = ThermoSimulator(temperature=temperature, **settings)
+                simulator.temperature = temperature
+                simulator.reset(grid)
+            results.append(result)
+            continue
+
+        if simulator is None or not warm_start:
+            simulator = ThermoSimulator(temperature=temperature, **settings)
+        simulator.temperature = temperature
+        result = _measure_point(simulator, n_equil, n_measure, measure_interval)
+        if path:
+            # Write to a temporary file first so an interrupted run never leaves a truncated entry
+            temporary = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez(temporary, grid=simulator.grid, **result)
+            os.replace(temporary, path)
+        results.append(result)
+    return results
+
+def sweep_temperatures(
+    temperatures: Sequence[float],
+    grid_size: int = 50,
+    update_rule: UpdateRule = UpdateRule.METROPOLIS,
+    n_equil: int = 1000,
+    n_measure: int = 1000,
+    measure_interval: int = 1,
+    num_processes: int = 1,
+    n_chains: Optional[int] = None,
+    warm_start: bool = True,
+    cache_dir: Optional[str] = None,
+    seed: Optional[int] = None,
+    **simulator_kwargs
+) -> Dict[str, np.ndarray]:
+    """Equilibrate and measure the model at every temperature of a sweep.
+
+    The temperatures are sorted and split into ``n_chains`` contiguous chains
+    (one per process by default). The chains run concurrently in a pool of
+    ``num_processes`` worker processes; within a chain the points run from
+    hot to cold and, with ``warm_start``, each starts from the equilibrated
+    configuration of the previous one. Every point still gets ``n_equil``
+    sweeps before ``n_measure`` samples spaced ``measure_interval`` sweeps apart.
+
+    With ``cache_dir`` every finished point is stored under a hash of its
+    parameters, so re-running a sweep with extra temperatures only computes
+    the new points; a ``lattice`` keyword is keyed by its bonds, not its
+    identity, and a different ``seed`` computes the points again. Extra keywords go to ``ThermoSimulator``.
+
+    Returns a dict of arrays in ascending temperature order: ``temperature``
+    and the per-site ``energy``, ``magnetization`` (mean ``|M|``),
+    ``specific_heat`` and ``susceptibility``, plus the ``binder_cumulant``.
+    """
+    temperatures = np.unique(np.asarray(temperatures, dtype=np.float64))[::-1]
+    n_chains = max(1, min(n_chains or num_processes, temperatures.shape[0]))
+    n_workers = max(1, min(num_processes, n_chains))
+    settings = dict(
+        simulator_kwargs, grid_size=grid_size, update_rule=update_rule,
+        num_processes=max(1, num_processes // n_workers)
+    )
+    key_settings = dict(
+        settings, n_equil=n_equil, n_measure=n_measure, measure_interval=measure_interval, seed=seed
+    )
+    key_settings.pop('num_processes')
+    keys = [_point_key(T, key_settings) if cache_dir else None for T in temperatures]
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    chains = [
+        list(zip(temperatures[chunk].tolist(), [keys[i] for i in chunk]))
+        for chunk in np.array_split(np.arange(temperatures.shape[0]), n_chains)
+    ]
+    seeds = [None] * n_chains
+    if seed is not None:
+        seeds = [int(s.generate_state(1)[0]) for s in np.random.SeedSequence(seed).spawn(n_chains)]
+    args = [
+        (chain, settings, n_equil, n_measure, measure_interval, warm_start, cache_dir, chain_seed)
+        for chain, chain_seed in zip(chains, seeds)
+    ]
+
+    # Fully cached chains are only read back, which is cheaper in this process
+    pending = [
+        c for c, chain in enumerate(chains)
+        if not cache_dir or not all(os.path.exists(_cache_path(cache_dir, key)) for _, key in chain)
+    ]
+    results = [None] * n_chains
+    if n_workers > 1 and len(pending) > 1:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(n_workers, len(pending)), mp_context=context) as executor:
+            for c, result in zip(pending, executor.map(_run_chain, *zip(*[args[c] for c in pending]))):
+                results[c] = result
+    for c in range(n_chains):
+        if results[c] is None:
+            results[c] = _run_chain(*args[c])
+
+    points = [point for chain in results for point in chain][::-1]
+    diagram = {'temperature': temperatures[::-1].copy()}
+    for name in OBSERVABLES:
+        diagram[name] = np.array([point[name] for point in points])
+    return diagram
@@ -1,5 +1,5 @@
 """Visualization package for the simulation."""
 
-from .plotter import Plotter
+from .plotter import Plotter, PlotObserver
 
-__all__ = ['Plotter'] 
\ No newline at end of file
+__all__ = ['Plotter', 'PlotObserver'] 
\ No newline at end of file
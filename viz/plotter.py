@@ -2,7 +2,9 @@
 
 import numpy as np
 import matplotlib.pyplot as plt
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
+
+from engine.observers import Observer, ThrottledObserver
 
 if TYPE_CHECKING:
     from engine.core import ThermoSimulator
@@ -45,9 +47,9 @@ class Plotter:
         
     def _plot_energy_magnetization(self) -> None:
         """Update the energy and magnetization plot."""
-        steps = range(len(self.simulator.metrics.energy_history))
-        self.energy_line.set_data(steps, self.simulator.metrics.energy_history)
-        self.mag_line.set_data(steps, self.simulator.metrics.magnetization_history)
+        metrics = self.simulator.metrics
+        self.energy_line.set_data(metrics.energy_history.index, metrics.energy_history.values)
+        self.mag_line.set_data(metrics.magnetization_history.index, metrics.magnetization_history.values)
         
         # Update axis limits
         self.ax2.relim()
@@ -55,4 +57,43 @@ class Plotter:
         
     def close(self):
         """Close the plotter and its figure."""
-        plt.close(self.fig) 
\ No newline at end of file
+        plt.close(self.fig)
+
+class _PlotUpdates(Observer):
+    """Draws every measurement it receives into a :class:`Plotter`."""
+    
+    def __init__(self, close_on_finish: bool):
+        """Initialize the observer."""
+        self.close_on_finish = close_on_finish
+        self.plotter: Optional[Plotter] = None
+        
+    def on_start(self, simulator: 'ThermoSimulator') -> None:
+        """Create the figure on first use."""
+        if self.plotter is None or self.plotter.simulator is not simulator:
+            self.plotter = Plotter(simulator)
+            
+    def on_measurement(self, simulator: 'ThermoSimulator') -> None:
+        """Redraw the figure."""
+        self.plotter.update()
+        
+    def on_finish(self, simulator: 'ThermoSimulator') -> None:
+        """Close the figure if requested."""
+        if self.close_on_finish:
+            self.plotter.close()
+            self.plotter = None
+
+class PlotObserver(ThrottledObserver):
+    """Live plot of a run, redrawn at most once per ``min_interval`` seconds.
+    
+    Pass it to ``ThermoSimulator.run(observers=[...])``; the figure is only
+    created when the run starts, so headless runs never import a GUI backend.
+    """
+    
+    def __init__(self, min_interval: float = 0.5, close_on_finish: bool = False):
+        """Initialize the observer."""
+        super().__init__(_PlotUpdates(close_on_finish), min_interval)
+        
+    @property
+    def plotter(self) -> Optional[Plotter]:
+        """The underlying plotter, once the run has started."""
+        return self.observer.plotter
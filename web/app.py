@@ -106,7 +106,8 @@ def main():
         
         # Energy plot
         fig, ax = plt.subplots(figsize=(6, 3))
-        ax.plot(st.session_state.simulator.metrics.energy_history)
+        energy_history = st.session_state.simulator.metrics.energy_history
+        ax.plot(energy_history.index, energy_history.values)
         ax.set_xlabel("Step")
         ax.set_ylabel("Energy")
         st.pyplot(fig)
@@ -114,7 +115,8 @@ def main():
         
         # Magnetization plot
         fig, ax = plt.subplots(figsize=(6, 3))
-        ax.plot(st.session_state.simulator.metrics.magnetization_history)
+        magnetization_history = st.session_state.simulator.metrics.magnetization_history
+        ax.plot(magnetization_history.index, magnetization_history.values)
         ax.set_xlabel("Step")
         ax.set_ylabel("Magnetization")
         st.pyplot(fig)